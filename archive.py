@@ -0,0 +1,302 @@
+import json
+import struct
+import zlib
+from bisect import bisect_left, bisect_right
+import numpy as np
+
+# Compression LZ4 optionnelle (plus rapide que zlib, un peu moins efficace)
+try:
+    import lz4.frame as lz4
+except ImportError:
+    lz4 = None
+
+# Archive de trajectoires : les instantanés sont regroupés en blocs de taille fixe dans le temps,
+# chaque bloc est compressé séparément, et un index (temps -> bloc) est écrit en fin de fichier.
+# On peut ainsi lire n'importe quelle tranche de temps en ne décompressant que les blocs concernés.
+#
+# Format : MAGIQUE | blocs compressés... | index JSON | taille de l'index (u64) | MAGIQUE
+MAGIQUE = b"TRAJ0001"
+FIN = struct.Struct('<Q8s')
+TAILLE_BLOC = 256  # Nombre d'instantanés par bloc
+ENCODAGES = ("delta", "quantifie")
+NIVEAUX_QUANTIFICATION = 2**16 - 1  # Positions et vitesses quantifiées sur 16 bits
+UNITES = {"longueur": "km", "temps": "s", "vitesse": "km/s", "masse": "kg"}
+
+# Fonction pour compresser un tableau sans perte : delta dans le temps des motifs binaires
+# (entiers, donc exactement réversible), mélange des octets, puis zlib ou lz4
+def compresser(tableau, compression="zlib", niveau=6):
+    entiers = np.ascontiguousarray(tableau).view(f'i{tableau.dtype.itemsize}')
+    delta = np.diff(entiers, axis=0, prepend=np.zeros_like(entiers[:1]))  # Débordement voulu (arithmétique modulaire)
+    melange = delta.reshape(len(delta), -1).view('uint8').reshape(-1, tableau.dtype.itemsize).T.tobytes()
+    if compression == "lz4":
+        if lz4 is None:
+            raise ValueError("La compression lz4 nécessite le module 'lz4' (pip install lz4).")
+        return lz4.compress(melange)
+    return zlib.compress(melange, niveau)
+
+# Fonction inverse de compresser
+def decompresser(donnees, forme, dtype, compression="zlib"):
+    dtype = np.dtype(dtype)
+    melange = lz4.decompress(donnees) if compression == "lz4" else zlib.decompress(donnees)
+    octets = np.frombuffer(melange, dtype='uint8').reshape(dtype.itemsize, -1).T.copy()
+    delta = octets.view(f'i{dtype.itemsize}').reshape(forme)
+    return np.cumsum(delta, axis=0, dtype=delta.dtype).view(dtype)
+
+# Fonction pour quantifier des positions ou des vitesses (instants, corps, dimension) sur 16 bits, relativement à la boîte
+# englobante de chaque corps dans le bloc : renvoie les codes, le minimum et le pas par corps et par axe
+def quantifier(valeurs):
+    minimum = valeurs.min(axis=0)
+    pas = (valeurs.max(axis=0) - minimum) / NIVEAUX_QUANTIFICATION
+    pas[pas == 0] = 1.0  # Valeur constante sur cet axe : un seul niveau suffit
+    codes = np.rint((valeurs - minimum) / pas).astype('uint16')
+    return codes, minimum, pas
+
+# Fonction inverse de quantifier (l'erreur par axe est au plus pas / 2)
+def dequantifier(codes, minimum, pas):
+    return minimum + codes * pas
+
+# Classe pour écrire une archive à partir des instantanés d'une simulation (flux.simulate)
+class EcrivainArchive:
+    # encodage : "delta" (valeurs exactes) ou "quantifie" (positions et vitesses sur 16 bits, pour la visualisation)
+    # erreur_max : erreur de reconstruction des positions tolérée (km) en mode "quantifie" ; un bloc qui ne la
+    # respecte pas est stocké sans perte (positions et vitesses)
+    def __init__(self, chemin, state, taille_bloc=TAILLE_BLOC, compression="zlib", niveau=6, vitesses=True, metadonnees=None,
+                 encodage="delta", erreur_max=None):
+        if compression == "lz4" and lz4 is None:
+            raise ValueError("La compression lz4 nécessite le module 'lz4' (pip install lz4).")
+        if encodage not in ENCODAGES:
+            raise ValueError(f"Encodage inconnu : {encodage!r} (choix : {', '.join(ENCODAGES)})")
+        self.taille_bloc = taille_bloc
+        self.encodage = encodage
+        self.erreur_max = erreur_max
+        self.erreurs = np.zeros(len(state))  # Erreur de reconstruction maximale des positions, par corps (km)
+        self.erreurs_vitesses = np.zeros(len(state))  # Idem pour les vitesses (km/s)
+        self.compression = compression
+        self.niveau = niveau
+        self.vitesses = vitesses
+        self.ids = state.ids.copy()
+        self.index = {
+            "corps": {"noms": list(state.noms), "ids": [int(i) for i in state.ids], "masses": [float(m) for m in state.masses]},
+            "dimension": state.dimension,
+            "unites": UNITES,
+            "compression": compression,
+            "metadonnees": metadonnees or {},
+            "blocs": [],
+        }
+        self._fichier = open(chemin, 'wb')
+        self._fichier.write(MAGIQUE)
+        self._en_attente = []
+
+    # Ajouter un instantané (les corps doivent rester les mêmes pendant toute l'archive)
+    def ajouter(self, instantane):
+        if not np.array_equal(instantane.ids, self.ids):
+            raise ValueError("Les corps ont changé : une archive ne contient qu'un ensemble fixe de corps.")
+        vitesses = instantane.vitesses.copy() if self.vitesses else None
+        self._en_attente.append((instantane.etape, instantane.temps, instantane.positions.copy(), vitesses))
+        if len(self._en_attente) == self.taille_bloc:
+            self._ecrire_bloc()
+
+    # Recopier tels quels (sans décompression) tous les blocs d'une archive existante, ex: pour la prolonger
+    def copier(self, lecteur):
+        if lecteur.index["compression"] != self.compression or not np.array_equal(lecteur.ids, self.ids):
+            raise ValueError("Seule une archive de mêmes corps et de même compression peut être recopiée.")
+        self._ecrire_bloc()
+        for bloc in lecteur.blocs:
+            entree = dict(bloc, tableaux={})
+            for nom, description in bloc["tableaux"].items():
+                lecteur._fichier.seek(description["decalage"])
+                donnees = lecteur._fichier.read(description["taille"])
+                entree["tableaux"][nom] = dict(description, decalage=self._fichier.tell())
+                self._fichier.write(donnees)
+            self.index["blocs"].append(entree)
+        if lecteur.erreurs_quantification is not None:
+            self.erreurs = np.maximum(self.erreurs, lecteur.erreurs_quantification)
+        if lecteur.erreurs_quantification_vitesses is not None:
+            self.erreurs_vitesses = np.maximum(self.erreurs_vitesses, lecteur.erreurs_quantification_vitesses)
+
+    # Tableaux à stocker pour un bloc : nom -> tableau
+    def _tableaux_bloc(self, en_attente):
+        tableaux = {
+            "etapes": np.array([etape for etape, _, _, _ in en_attente], dtype='int64'),
+            "temps": np.array([temps for _, temps, _, _ in en_attente], dtype='float64'),
+            "positions": np.stack([positions for _, _, positions, _ in en_attente]),
+        }
+        if self.vitesses:
+            tableaux["vitesses"] = np.stack([vitesses for _, _, _, vitesses in en_attente])
+        return tableaux
+
+    def _ecrire_bloc(self):
+        if not self._en_attente:
+            return
+        tableaux = self._tableaux_bloc(self._en_attente)
+        entree = {
+            "temps_debut": float(tableaux["temps"][0]),
+            "temps_fin": float(tableaux["temps"][-1]),
+            "etape_debut": int(tableaux["etapes"][0]),
+            "nombre": len(self._en_attente),
+            "tableaux": {},
+        }
+        encodages = dict.fromkeys(tableaux, "delta")
+        if self.encodage == "quantifie":
+            # Nom -> (codes, minimum, pas, erreur de reconstruction maximale par corps)
+            quantifies = {}
+            for nom in ("positions", "vitesses"):
+                if nom in tableaux:
+                    codes, minimum, pas = quantifier(tableaux[nom])
+                    erreurs = np.linalg.norm(dequantifier(codes, minimum, pas) - tableaux[nom], axis=-1).max(axis=0)
+                    quantifies[nom] = (codes, minimum, pas, erreurs)
+            erreurs = quantifies["positions"][3]
+            if self.erreur_max is None or erreurs.max() <= self.erreur_max:
+                for nom, (codes, minimum, pas, _) in quantifies.items():
+                    tableaux.update({nom: codes, nom + "_minimum": minimum, nom + "_pas": pas})
+                    encodages[nom] = "quantifie"
+                self.erreurs = np.maximum(self.erreurs, erreurs)
+                if "vitesses" in quantifies:
+                    self.erreurs_vitesses = np.maximum(self.erreurs_vitesses, quantifies["vitesses"][3])
+            quantifie = encodages["positions"] == "quantifie"
+            entree["erreur_max"] = float(erreurs.max()) if quantifie else 0.0
+            if "vitesses" in quantifies:
+                entree["erreur_max_vitesses"] = float(quantifies["vitesses"][3].max()) if quantifie else 0.0
+
+        for nom, tableau in tableaux.items():
+            donnees = compresser(tableau, self.compression, self.niveau)
+            entree["tableaux"][nom] = {
+                "decalage": self._fichier.tell(), "taille": len(donnees),
+                "forme": list(tableau.shape), "dtype": tableau.dtype.str, "encodage": encodages.get(nom, "delta"),
+            }
+            self._fichier.write(donnees)
+        self.index["blocs"].append(entree)
+        self._en_attente = []
+
+    def fermer(self):
+        if self._fichier.closed:
+            return
+        self._ecrire_bloc()
+        if self.encodage == "quantifie":
+            self.index["erreurs_quantification"] = [float(erreur) for erreur in self.erreurs]
+            if self.vitesses:
+                self.index["erreurs_quantification_vitesses"] = [float(erreur) for erreur in self.erreurs_vitesses]
+        index = json.dumps(self.index).encode('utf-8')
+        self._fichier.write(index)
+        self._fichier.write(FIN.pack(len(index), MAGIQUE))
+        self._fichier.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+# Fonction pour archiver tous les instantanés d'un flux (ex: flux.simulate(state, dt, steps, every=k))
+def archiver(chemin, state, instantanes, **options):
+    with EcrivainArchive(chemin, state, **options) as ecrivain:
+        for instantane in instantanes:
+            ecrivain.ajouter(instantane)
+    return chemin
+
+# Classe pour lire une archive avec accès direct à n'importe quelle tranche de temps
+class LecteurArchive:
+    def __init__(self, chemin):
+        self._fichier = open(chemin, 'rb')
+        if self._fichier.read(len(MAGIQUE)) != MAGIQUE:
+            raise ValueError(f"'{chemin}' n'est pas une archive de trajectoires.")
+        self._fichier.seek(-FIN.size, 2)
+        taille_index, magique = FIN.unpack(self._fichier.read(FIN.size))
+        if magique != MAGIQUE:
+            raise ValueError(f"Archive '{chemin}' incomplète (index manquant).")
+        self._fichier.seek(-FIN.size - taille_index, 2)
+        self.index = json.loads(self._fichier.read(taille_index))
+        self.blocs = self.index["blocs"]
+        self._debuts = [bloc["temps_debut"] for bloc in self.blocs]
+        self._fins = [bloc["temps_fin"] for bloc in self.blocs]
+
+    @property
+    def noms(self):
+        return self.index["corps"]["noms"]
+
+    @property
+    def ids(self):
+        return np.array(self.index["corps"]["ids"], dtype='int64')
+
+    @property
+    def metadonnees(self):
+        return self.index["metadonnees"]
+
+    # Erreur de reconstruction maximale des positions par corps (km), None si l'archive est exacte
+    @property
+    def erreurs_quantification(self):
+        erreurs = self.index.get("erreurs_quantification")
+        return None if erreurs is None else np.array(erreurs)
+
+    # Erreur de reconstruction maximale des vitesses par corps (km/s), None si elles sont exactes ou absentes
+    @property
+    def erreurs_quantification_vitesses(self):
+        erreurs = self.index.get("erreurs_quantification_vitesses")
+        return None if erreurs is None else np.array(erreurs)
+
+    @property
+    def temps_debut(self):
+        return self._debuts[0] if self.blocs else None
+
+    @property
+    def temps_fin(self):
+        return self._fins[-1] if self.blocs else None
+
+    def __len__(self):
+        return sum(bloc["nombre"] for bloc in self.blocs)
+
+    # Lire un tableau d'un bloc (seul ce tableau de ce bloc est décompressé)
+    def lire_tableau(self, numero_bloc, nom):
+        description = self.blocs[numero_bloc]["tableaux"][nom]
+        tableau = self._lire_brut(description)
+        if description["encodage"] == "quantifie":
+            minimum = self.lire_tableau(numero_bloc, nom + "_minimum")
+            pas = self.lire_tableau(numero_bloc, nom + "_pas")
+            return dequantifier(tableau, minimum, pas)
+        return tableau
+
+    def _lire_brut(self, description):
+        self._fichier.seek(description["decalage"])
+        donnees = self._fichier.read(description["taille"])
+        return decompresser(donnees, tuple(description["forme"]), description["dtype"], self.index["compression"])
+
+    # Numéros des blocs qui recouvrent l'intervalle [t_debut, t_fin]
+    def blocs_entre(self, t_debut, t_fin):
+        return range(bisect_left(self._fins, t_debut), bisect_right(self._debuts, t_fin))
+
+    # Lire les instantanés de l'intervalle [t_debut, t_fin] : temps, positions (et vitesses si archivées)
+    def lire(self, t_debut, t_fin, vitesses=False):
+        temps, positions, liste_vitesses = [], [], []
+        for numero in self.blocs_entre(t_debut, t_fin):
+            temps_bloc = self.lire_tableau(numero, "temps")
+            garde = (temps_bloc >= t_debut) & (temps_bloc <= t_fin)
+            temps.append(temps_bloc[garde])
+            positions.append(self.lire_tableau(numero, "positions")[garde])
+            if vitesses:
+                liste_vitesses.append(self.lire_tableau(numero, "vitesses")[garde])
+
+        forme = (0, len(self.noms), self.index["dimension"])
+        temps = np.concatenate(temps) if temps else np.empty(0)
+        positions = np.concatenate(positions) if positions else np.empty(forme)
+        if vitesses:
+            return temps, positions, np.concatenate(liste_vitesses) if liste_vitesses else np.empty(forme)
+        return temps, positions
+
+    # Dernier instantané archivé à l'instant t ou avant : (temps, positions, vitesses)
+    def instantane(self, t):
+        numero = bisect_right(self._debuts, t) - 1
+        if numero < 0:
+            raise ValueError(f"L'instant {t} précède le début de l'archive.")
+        temps = self.lire_tableau(numero, "temps")
+        i = np.searchsorted(temps, t, side='right') - 1
+        vitesses = self.lire_tableau(numero, "vitesses")[i] if "vitesses" in self.blocs[numero]["tableaux"] else None
+        return temps[i], self.lire_tableau(numero, "positions")[i], vitesses
+
+    def fermer(self):
+        self._fichier.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
@@ -0,0 +1,58 @@
+import json
+import os
+import platform
+import sys
+import numpy as np
+
+# Outils communs aux mesures de performances : accès aux modules du projet, systèmes de test,
+# description de la machine et écriture des résultats
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from moteur import G, VERSION_MOTEUR
+from etat import SystemState
+
+MASSE_SOLEIL = 1.989e30
+
+# Fonction pour créer un système aléatoire de n corps : un soleil et n - 1 corps sur des orbites
+# quasi circulaires (rayons de 5e7 à 5e9 km, masses de 1e20 à 1e26 kg), reproductible par la graine
+def systeme_aleatoire(n, graine=0):
+    generateur = np.random.default_rng(graine)
+    rayons = 10 ** generateur.uniform(np.log10(5e7), np.log10(5e9), n - 1)
+    angles = generateur.uniform(0, 2 * np.pi, n - 1)
+    vitesses_orbitales = np.sqrt(G * MASSE_SOLEIL / rayons)
+    positions = np.zeros((n, 2))
+    vitesses = np.zeros((n, 2))
+    positions[1:] = np.stack([rayons * np.cos(angles), rayons * np.sin(angles)], axis=1)
+    vitesses[1:] = np.stack([-vitesses_orbitales * np.sin(angles), vitesses_orbitales * np.cos(angles)], axis=1)
+    masses = np.concatenate([[MASSE_SOLEIL], 10 ** generateur.uniform(20, 26, n - 1)])
+    return positions, vitesses, masses
+
+# Fonction pour créer un état (etat.SystemState) à partir de tableaux
+def etat_depuis(positions, vitesses, masses):
+    state = SystemState(capacite=max(len(masses), 1))
+    for i, (position, vitesse, masse) in enumerate(zip(positions, vitesses, masses)):
+        state.ajouter(f"corps-{i}", masse, position, vitesse)
+    return state
+
+# Description de la machine et des versions, jointe à chaque fichier de résultats
+def infos_machine():
+    infos = {
+        "plateforme": platform.platform(),
+        "processeur": platform.processor() or platform.machine(),
+        "nombre_cpu": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "version_moteur": VERSION_MOTEUR,
+    }
+    try:
+        import numba
+        infos["numba"] = numba.__version__
+    except ImportError:
+        infos["numba"] = None
+    return infos
+
+def ecrire_json(resultats, chemin):
+    with open(chemin, 'w', encoding='utf-8') as fichier:
+        json.dump(resultats, fichier, indent=2, ensure_ascii=False)
+    return chemin
@@ -0,0 +1,37 @@
+import numpy as np
+from commun import G
+
+# Copie de la classe Corps d'origine (simulation.py avant SystemState), référence des mesures de vitesse :
+# chaque corps possède ses propres tableaux position, vitesse et force. La classe Corps actuelle n'est plus
+# qu'une vue sur une ligne de SystemState, dont chaque accès passe par des propriétés (environ 2 fois plus lente).
+# Le chargement des images est retiré : il n'intervient pas dans un pas de simulation.
+
+# Classe pour représenter un objet céleste
+class Corps:
+    def __init__(self, nom, masse, position, vitesse):
+        self.nom = nom
+        self.masse = masse
+        self.position = np.array(position, dtype='float64')
+        self.vitesse = np.array(vitesse, dtype='float64')
+        self.force = np.array([0.0, 0.0], dtype='float64')
+
+    def maj_force(self, autres_corps):
+        self.force = np.array([0.0, 0.0], dtype='float64')
+
+        for autre in autres_corps:
+            if autre != self:
+                delta_pos = autre.position - self.position
+                distance = np.linalg.norm(delta_pos)
+
+                if distance == 0:
+                    continue
+
+                force_magnitude = G * self.masse * autre.masse / distance**2
+                force_direction = delta_pos / distance
+
+                self.force += force_magnitude * force_direction
+
+    def maj_position_et_vitesse(self, dt):
+        acceleration = self.force / self.masse
+        self.vitesse += acceleration * dt
+        self.position += self.vitesse * dt
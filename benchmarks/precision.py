@@ -0,0 +1,239 @@
+import argparse
+import time
+import numpy as np
+from commun import infos_machine, ecrire_json
+import moteur
+from moteur import G, ETA_AARSETH, avancer_hermite, pas_hermite
+from scenario import SYSTEME_SOLAIRE, construire_etat
+from elements import etat_vers_elements, elements_vers_etat
+
+# Diagrammes travail-précision des intégrateurs : chaque intégrateur est exécuté sur une grille de pas de temps
+# (ou de précisions eta) pour des scénarios de référence, et l'erreur finale (énergie relative, position) est
+# comparée à une solution de référence, en fonction du temps de calcul et du nombre d'évaluations de force.
+# Sert à choisir les pas de temps par défaut (scenario.SYSTEME_SOLAIRE et simulation.py utilisent 5 jours).
+#
+#   python benchmarks/precision.py --sortie precision.json --graphique precision.png
+#
+# Intégrateurs comparés :
+#   euler          : Euler semi-implicite de la boucle d'origine (Corps.maj_position_et_vitesse), vectorisé
+#   hermite fixe   : Hermite d'ordre 4 à pas fixe dt (moteur.pas_hermite)
+#   hermite sortie : ce que fait la simulation, des sous-pas adaptatifs (eta par défaut) limités par le pas de sortie dt
+#   hermite eta    : Hermite adaptatif seul, sur toute la durée, pour une grille de eta
+
+JOUR = 86400.0
+DT_DEFAUT = SYSTEME_SOLAIRE["dt"]
+PAS = [DT_DEFAUT * 2.0**k for k in range(2, -9, -1)]  # De 20 jours à 14 minutes
+ETAS = [ETA_AARSETH * 2.0**k for k in range(4, -6, -1)]
+FACTEUR_ETA_REFERENCE = 1e-3  # Précision de la solution de référence numérique : eta = ETA_AARSETH × facteur
+DUREE_MESURE = 0.1  # Durée minimale de mesure d'un point (s) : les exécutions courtes sont répétées
+TOLERANCE_ENERGIE = 1e-6  # Erreur relative d'énergie visée pour la recommandation de pas
+
+# Scénarios de référence (format de scenario.py) et durée simulée
+SCENARIOS = {
+    # Deux corps de masses comparables sur une orbite excentrique : solution exacte (Kepler)
+    "deux corps": {
+        "masse_soleil": 1.989e30,
+        "planetes": [{"nom": "Compagnon", "masse": 1.989e29, "periode_jours": 365.25, "excentricite": 0.6}],
+        "duree_jours": 3 * 365.25,
+    },
+    "système solaire": dict(SYSTEME_SOLAIRE, duree_jours=2 * 365.25),
+    # Planète de masse terrestre qui croise l'orbite de Jupiter et passe à environ 1,4e6 km de Jupiter vers le 163e jour
+    "rencontre proche": {
+        "masse_soleil": 1.989e30,
+        "planetes": [
+            {"nom": "Jupiter", "masse": 1.898e27, "periode_jours": 4332.59},
+            {"nom": "Planète", "masse": 5.972e24, "periode_jours": 3100.15, "excentricite": 0.6, "omega": 2.7576, "anomalie_moyenne": 4.5029},
+        ],
+        "duree_jours": 365.25,
+    },
+}
+
+# Classe pour compter les évaluations de force (appels à moteur.calculer_acceleration_et_jerk) pendant un bloc
+class CompteurForces:
+    def __init__(self):
+        self.evaluations = 0
+        self._origine = None
+
+    def __enter__(self):
+        self._origine = moteur.calculer_acceleration_et_jerk
+
+        def compter(*args, **kwargs):
+            self.evaluations += 1
+            return self._origine(*args, **kwargs)
+        moteur.calculer_acceleration_et_jerk = compter
+        return self
+
+    def __exit__(self, *exc):
+        moteur.calculer_acceleration_et_jerk = self._origine
+
+# Fonction pour calculer l'énergie totale (cinétique + potentielle) du système
+def energie(positions, vitesses, masses):
+    cinetique = 0.5 * np.sum(masses * np.einsum('ij,ij->i', vitesses, vitesses))
+    i, j = np.triu_indices(len(masses), 1)
+    potentielle = -np.sum(G * masses[i] * masses[j] / np.linalg.norm(positions[i] - positions[j], axis=1))
+    return cinetique + potentielle
+
+# Fonction pour la solution exacte d'un problème à deux corps : orbite de Kepler relative et barycentre en ligne droite
+def solution_deux_corps(positions, vitesses, masses, duree):
+    mu = G * masses.sum()
+    elements = etat_vers_elements(positions[1] - positions[0], vitesses[1] - vitesses[0], mu)
+    moyen_mouvement = np.sqrt(mu / np.abs(elements.a) ** 3)
+    relative, vitesse_relative = elements_vers_etat(elements.a, elements.e, elements.omega, elements.M + moyen_mouvement * duree, mu, elements.sens)
+
+    fractions = masses[::-1] / masses.sum() * np.array([-1, 1])
+    barycentre = (masses @ positions + (masses @ vitesses) * duree) / masses.sum()
+    vitesse_barycentre = masses @ vitesses / masses.sum()
+    return barycentre + fractions[:, np.newaxis] * relative, vitesse_barycentre + fractions[:, np.newaxis] * vitesse_relative
+
+# Intégrateurs : avancent positions et vitesses (en place) de `duree` avec le paramètre donné (dt ou eta)
+def euler(positions, vitesses, masses, duree, dt, moteur_calcul=None):
+    gm = G * masses
+    etapes = int(np.ceil(duree / dt))
+    dt = duree / etapes
+    for _ in range(etapes):
+        acceleration, _ = moteur.calculer_acceleration_et_jerk(positions, vitesses, masses, moteur_calcul=moteur_calcul, gm=gm)
+        vitesses += acceleration * dt
+        positions += vitesses * dt
+
+def hermite_fixe(positions, vitesses, masses, duree, dt, moteur_calcul=None):
+    gm = G * masses
+    etapes = int(np.ceil(duree / dt))
+    dt = duree / etapes
+    acceleration, jerk = None, None
+    for _ in range(etapes):
+        acceleration, jerk, _ = pas_hermite(positions, vitesses, masses, dt, acceleration, jerk, moteur_calcul=moteur_calcul, gm=gm)
+
+def hermite_sortie(positions, vitesses, masses, duree, dt, moteur_calcul=None):
+    gm = G * masses
+    etapes = int(np.ceil(duree / dt))
+    dt = duree / etapes
+    pas_interne = None
+    for _ in range(etapes):
+        pas_interne = avancer_hermite(positions, vitesses, masses, dt, pas_interne, moteur_calcul=moteur_calcul, gm=gm)
+
+def hermite_eta(positions, vitesses, masses, duree, eta, moteur_calcul=None):
+    avancer_hermite(positions, vitesses, masses, duree, eta=eta, moteur_calcul=moteur_calcul)
+
+# Nom -> (fonction, paramètre, grille)
+INTEGRATEURS = {
+    "euler": (euler, "dt", PAS),
+    "hermite fixe": (hermite_fixe, "dt", PAS),
+    "hermite sortie": (hermite_sortie, "dt", PAS),
+    "hermite eta": (hermite_eta, "eta", ETAS),
+}
+
+# Fonction pour calculer l'état de référence à la fin d'un scénario (exact pour deux corps, sinon Hermite très précis)
+def reference(positions, vitesses, masses, duree, moteur_calcul=None):
+    if len(masses) == 2:
+        return solution_deux_corps(positions, vitesses, masses, duree)
+    positions, vitesses = positions.copy(), vitesses.copy()
+    avancer_hermite(positions, vitesses, masses, duree, eta=ETA_AARSETH * FACTEUR_ETA_REFERENCE, moteur_calcul=moteur_calcul)
+    return positions, vitesses
+
+# Fonction pour mesurer un point : temps par exécution, évaluations de force et erreurs finales
+def mesurer(fonction, valeur, positions, vitesses, masses, duree, reference_finale, energie_initiale, moteur_calcul=None):
+    executions, ecoule = 0, 0.0
+    while ecoule < DUREE_MESURE:
+        x, v = positions.copy(), vitesses.copy()
+        with CompteurForces() as compteur:
+            debut = time.perf_counter()
+            with np.errstate(all='ignore'):
+                fonction(x, v, masses, duree, valeur, moteur_calcul)
+            ecoule += time.perf_counter() - debut
+        executions += 1
+
+    with np.errstate(all='ignore'):
+        erreur_energie = abs((energie(x, v, masses) - energie_initiale) / energie_initiale)
+        erreur_position = np.max(np.linalg.norm(x - reference_finale[0], axis=1))
+    return {
+        "valeur": valeur,
+        "secondes": ecoule / executions,
+        "evaluations": compteur.evaluations,
+        # Erreurs non finies (intégration divergente) enregistrées comme null
+        "erreur_energie": float(erreur_energie) if np.isfinite(erreur_energie) else None,
+        "erreur_position_km": float(erreur_position) if np.isfinite(erreur_position) else None,
+    }
+
+def executer(noms_scenarios, noms_integrateurs, moteur_calcul=None):
+    resultats = {"machine": infos_machine(), "moteur_calcul": moteur_calcul or moteur.MOTEUR_CALCUL, "scenarios": {}}
+    for nom in noms_scenarios:
+        scenario = SCENARIOS[nom]
+        state = construire_etat(scenario)
+        positions, vitesses, masses = state.positions.copy(), state.vitesses.copy(), state.masses.copy()
+        duree = scenario["duree_jours"] * JOUR
+        moteur.calculer_acceleration_et_jerk(positions, vitesses, masses, moteur_calcul=moteur_calcul)  # Compilation Numba
+
+        reference_finale = reference(positions, vitesses, masses, duree, moteur_calcul)
+        energie_initiale = energie(positions, vitesses, masses)
+        series = {}
+        for nom_integrateur in noms_integrateurs:
+            fonction, parametre, grille = INTEGRATEURS[nom_integrateur]
+            mesures = series[nom_integrateur] = {"parametre": parametre, "mesures": []}
+            for valeur in grille:
+                mesure = mesurer(fonction, valeur, positions, vitesses, masses, duree, reference_finale, energie_initiale, moteur_calcul)
+                mesures["mesures"].append(mesure)
+                valeur_affichee = f"{valeur / JOUR:9.4f} j" if parametre == "dt" else f"{valeur:11.3e}"
+                print(f"{nom:18s} {nom_integrateur:16s} {parametre}={valeur_affichee}  {mesure['secondes']:9.4f} s  "
+                      f"{mesure['evaluations']:8d} forces  énergie {mesure['erreur_energie'] or np.inf:9.2e}  position {mesure['erreur_position_km'] or np.inf:9.2e} km")
+        resultats["scenarios"][nom] = {"duree_jours": scenario["duree_jours"], "corps": len(masses), "integrateurs": series}
+    return resultats
+
+# Fonction pour trouver, par scénario et par intégrateur, le plus grand pas (ou eta) dont l'erreur d'énergie
+# reste sous la tolérance
+def recommander(resultats, tolerance=TOLERANCE_ENERGIE):
+    recommandations = {}
+    for nom, scenario in resultats["scenarios"].items():
+        recommandations[nom] = {}
+        for nom_integrateur, serie in scenario["integrateurs"].items():
+            valables = [mesure["valeur"] for mesure in serie["mesures"] if mesure["erreur_energie"] is not None and mesure["erreur_energie"] <= tolerance]
+            recommandations[nom][nom_integrateur] = {serie["parametre"]: max(valables) if valables else None}
+    return recommandations
+
+# Diagrammes : une ligne par scénario ; erreurs d'énergie et de position en fonction du temps et des évaluations
+def tracer(resultats, chemin):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    scenarios = resultats["scenarios"]
+    fig, axes = plt.subplots(len(scenarios), 4, figsize=(22, 5 * len(scenarios)), squeeze=False)
+    colonnes = [("secondes", "erreur_energie"), ("evaluations", "erreur_energie"), ("secondes", "erreur_position_km"), ("evaluations", "erreur_position_km")]
+    etiquettes = {"secondes": "Temps de calcul (s)", "evaluations": "Évaluations de force", "erreur_energie": "Erreur relative d'énergie", "erreur_position_km": "Erreur de position (km)"}
+    for ligne, (nom, scenario) in zip(axes, scenarios.items()):
+        for ax, (x, y) in zip(ligne, colonnes):
+            for nom_integrateur, serie in scenario["integrateurs"].items():
+                points = [(mesure[x], mesure[y]) for mesure in serie["mesures"] if mesure[y]]
+                if points:
+                    ax.loglog(*zip(*points), marker='o', label=nom_integrateur)
+            ax.set_xlabel(etiquettes[x])
+            ax.set_ylabel(etiquettes[y])
+            ax.set_title(f"{nom} ({scenario['duree_jours']:g} jours)")
+            ax.grid(True, which='both', alpha=0.3)
+        ligne[0].legend(fontsize=8)
+    fig.tight_layout()
+    fig.savefig(chemin, dpi=100)
+    return chemin
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Diagrammes travail-précision des intégrateurs")
+    parser.add_argument("--scenarios", nargs="*", default=list(SCENARIOS), choices=list(SCENARIOS), metavar="SCENARIO",
+                        help=f"Scénarios (par défaut : tous) : {', '.join(SCENARIOS)}")
+    parser.add_argument("--integrateurs", nargs="*", default=list(INTEGRATEURS), choices=list(INTEGRATEURS), metavar="INTEGRATEUR",
+                        help=f"Intégrateurs (par défaut : tous) : {', '.join(INTEGRATEURS)}")
+    parser.add_argument("--moteur", default=None, help="Moteur de force (numpy, numba ; par défaut : le plus rapide disponible)")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE_ENERGIE, help="Erreur relative d'énergie visée pour la recommandation")
+    parser.add_argument("--sortie", default="precision.json", help="Fichier JSON des résultats")
+    parser.add_argument("--graphique", default="precision.png", help="Image des diagrammes (vide pour ne pas tracer)")
+    arguments = parser.parse_args()
+
+    resultats = executer(arguments.scenarios, arguments.integrateurs, arguments.moteur)
+    resultats["recommandations"] = recommander(resultats, arguments.tolerance)
+    print(f"Plus grand paramètre avec une erreur d'énergie <= {arguments.tolerance:g} (pas en jours) :")
+    for nom, recommandations in resultats["recommandations"].items():
+        for nom_integrateur, recommandation in recommandations.items():
+            (parametre, valeur), = recommandation.items()
+            texte = "aucun" if valeur is None else (f"{valeur / JOUR:g} j" if parametre == "dt" else f"{valeur:g}")
+            print(f"  {nom:18s} {nom_integrateur:16s} {parametre} = {texte}")
+    print("Résultats :", ecrire_json(resultats, arguments.sortie))
+    if arguments.graphique:
+        print("Diagrammes :", tracer(resultats, arguments.graphique))
@@ -0,0 +1,207 @@
+import argparse
+import time
+import tracemalloc
+from commun import systeme_aleatoire, infos_machine, ecrire_json
+import moteur
+from moteur import calculer_acceleration_et_jerk, pas_hermite
+from particules import ParticulesTest, avancer_hermite_avec_particules
+
+# Mesure du nombre de pas par seconde de chaque moteur de force et de chaque intégrateur, pour N = 2 à 100 000 corps,
+# avec le pic de mémoire d'un pas : allocations Python et NumPy du processus principal suivies par tracemalloc
+# (les allocations internes de Numba n'y apparaissent pas), plus, pour les moteurs multiprocessus, la hausse de la
+# mémoire résidente de chaque processus de calcul (VmHWM - VmRSS avant le premier pas, lues dans /proc) ; null
+# si cette mémoire ne peut pas être lue (hors Linux). Résultats en JSON et courbes d'échelle en PNG.
+#
+#   python benchmarks/vitesse.py --sortie vitesse.json --graphique vitesse.png
+#
+# Un cas est abandonné pour les N suivants dès qu'un pas dépasse --pas-max secondes (estimation en N²).
+
+TAILLES = [2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536, 100000]
+DT = 86400.0  # Pas fixe (s) : un jour
+DUREE_MESURE = 0.5  # Durée minimale de mesure par cas (s)
+CORPS_MASSIFS_PARTICULES = 9  # Corps massifs du cas avec particules test (les autres sont des particules)
+
+# Chaque cas prépare un système de n corps et renvoie (fonction qui fait un pas, fonction de nettoyage,
+# identifiants des processus de calcul dont la mémoire est hors du processus principal)
+
+# Référence : la boucle d'origine sur les objets Corps d'origine, qui possèdent leurs tableaux (corps_origine.py ;
+# force en O(N²) en Python, Euler explicite)
+def cas_corps(n):
+    from corps_origine import Corps
+    positions, vitesses, masses = systeme_aleatoire(n)
+    corps_celestes = [Corps(f"corps-{i}", masse, position, vitesse) for i, (position, vitesse, masse) in enumerate(zip(positions, vitesses, masses))]
+    return _pas_corps(corps_celestes), None, []
+
+# Même boucle sur la classe Corps actuelle (simulation.py), vue sur une ligne de SystemState
+def cas_corps_vues(n):
+    from simulation import Corps
+    from etat import SystemState
+    positions, vitesses, masses = systeme_aleatoire(n)
+    state = SystemState()
+    corps_celestes = [Corps(f"corps-{i}", masse, position, vitesse, etat=state) for i, (position, vitesse, masse) in enumerate(zip(positions, vitesses, masses))]
+    return _pas_corps(corps_celestes), None, []
+
+def _pas_corps(corps_celestes):
+    def pas():
+        for corps in corps_celestes:
+            corps.maj_force(corps_celestes)
+        for corps in corps_celestes:
+            corps.maj_position_et_vitesse(DT)
+    return pas
+
+# Intégrateur de Hermite (un pas fixe, une évaluation de force par pas) avec un moteur donné
+def cas_hermite(moteur_calcul):
+    def cas(n):
+        positions, vitesses, masses = systeme_aleatoire(n)
+        fermer, processus = None, []
+        if moteur_calcul == "multiprocessus":
+            from parallele import MoteurMultiprocessus
+            moteur_utilise = MoteurMultiprocessus(n)
+            fermer, processus = moteur_utilise.fermer, moteur_utilise.pids
+        else:
+            moteur_utilise = moteur_calcul
+        derivees = list(calculer_acceleration_et_jerk(positions, vitesses, masses, moteur_calcul=moteur_utilise))
+
+        def pas():
+            derivees[:] = pas_hermite(positions, vitesses, masses, DT, *derivees, moteur_calcul=moteur_utilise)[:2]
+        return pas, fermer, processus
+    return cas
+
+# Évaluation seule des forces (accélération et jerk) avec un moteur donné
+def cas_force(moteur_calcul):
+    def cas(n):
+        positions, vitesses, masses = systeme_aleatoire(n)
+        fermer, processus = None, []
+        if moteur_calcul == "multiprocessus":
+            from parallele import MoteurMultiprocessus
+            moteur_utilise = MoteurMultiprocessus(n)
+            fermer, processus = moteur_utilise.fermer, moteur_utilise.pids
+        else:
+            moteur_utilise = moteur_calcul
+
+        def pas():
+            calculer_acceleration_et_jerk(positions, vitesses, masses, moteur_calcul=moteur_utilise)
+        return pas, fermer, processus
+    return cas
+
+# Hermite avec particules test en float32 : quelques corps massifs, tous les autres sans masse
+def cas_particules(n):
+    positions, vitesses, masses = systeme_aleatoire(n)
+    massifs = min(n, CORPS_MASSIFS_PARTICULES)
+    particules = ParticulesTest(positions[massifs:], vitesses[massifs:], positions[0], vitesses[0])
+    positions, vitesses, masses = positions[:massifs].copy(), vitesses[:massifs].copy(), masses[:massifs]
+
+    def pas():
+        avancer_hermite_avec_particules(positions, vitesses, masses, particules, DT, dt_initial=DT)
+    return pas, None, []
+
+def cas_disponibles():
+    cas = {"corps (référence)": cas_corps, "corps (vues SystemState)": cas_corps_vues}
+    moteurs = ["numpy"] + (["numba"] if moteur.noyaux_numba is not None else []) + ["multiprocessus"]
+    for moteur_calcul in moteurs:
+        cas[f"hermite {moteur_calcul}"] = cas_hermite(moteur_calcul)
+    for moteur_calcul in moteurs:
+        cas[f"force {moteur_calcul}"] = cas_force(moteur_calcul)
+    cas["hermite particules float32"] = cas_particules
+    return cas
+
+# Fonction pour lire une valeur de mémoire (VmRSS, VmHWM) d'un processus dans /proc, en octets ; None si impossible
+def memoire_processus(pid, champ):
+    try:
+        with open(f"/proc/{pid}/status") as fichier:
+            for ligne in fichier:
+                if ligne.startswith(champ + ":"):
+                    return int(ligne.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+# Fonction pour mesurer un cas pour n corps : pas par seconde et pic de mémoire d'un pas
+def mesurer(cas, n, duree_mesure=DUREE_MESURE):
+    pas, fermer, processus = cas(n)
+    try:
+        memoire_initiale = [memoire_processus(pid, "VmRSS") for pid in processus]
+        pas()  # Échauffement (compilation Numba, démarrage des processus, caches)
+        nombre_pas, debut = 0, time.perf_counter()
+        while True:
+            pas()
+            nombre_pas += 1
+            ecoule = time.perf_counter() - debut
+            if ecoule >= duree_mesure:
+                break
+
+        tracemalloc.start()
+        pas()
+        memoire_max = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        # Mémoire des processus de calcul : hausse du pic de mémoire résidente depuis la création
+        memoire_pics = [memoire_processus(pid, "VmHWM") for pid in processus]
+        if None in memoire_initiale or None in memoire_pics:
+            memoire_max = None
+        else:
+            memoire_max += sum(pic - initiale for pic, initiale in zip(memoire_pics, memoire_initiale))
+    finally:
+        if fermer is not None:
+            fermer()
+    return {"n": n, "pas": nombre_pas, "secondes_par_pas": ecoule / nombre_pas, "pas_par_seconde": nombre_pas / ecoule,
+            "memoire_max_octets": memoire_max, "memoire_processus": bool(processus)}
+
+def executer(noms_cas, tailles, pas_max, duree_mesure=DUREE_MESURE):
+    disponibles = cas_disponibles()
+    resultats = {"machine": infos_machine(), "dt": DT, "cas": {}}
+    for nom in noms_cas:
+        mesures = resultats["cas"][nom] = []
+        for n in tailles:
+            if mesures and mesures[-1]["secondes_par_pas"] * (n / mesures[-1]["n"]) ** 2 > pas_max:
+                print(f"{nom:32s} N={n:>6d}  abandonné (pas estimé > {pas_max} s)")
+                break
+            mesure = mesurer(disponibles[nom], n, duree_mesure)
+            mesures.append(mesure)
+            memoire = "inconnue" if mesure["memoire_max_octets"] is None else f"{mesure['memoire_max_octets'] / 2**20:9.2f} Mio"
+            print(f"{nom:32s} N={n:>6d}  {mesure['pas_par_seconde']:12.2f} pas/s  {memoire}")
+    return resultats
+
+# Courbes d'échelle : pas par seconde et pic de mémoire en fonction de N
+def tracer(resultats, chemin):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, (ax_vitesse, ax_memoire) = plt.subplots(1, 2, figsize=(14, 6))
+    for nom, mesures in resultats["cas"].items():
+        if not mesures:
+            continue
+        n = [mesure["n"] for mesure in mesures]
+        ax_vitesse.loglog(n, [mesure["pas_par_seconde"] for mesure in mesures], marker='o', label=nom)
+        memoires = [(mesure["n"], max(mesure["memoire_max_octets"], 1) / 2**20) for mesure in mesures if mesure["memoire_max_octets"] is not None]
+        if memoires:
+            ax_memoire.loglog(*zip(*memoires), marker='o', label=nom)
+    ax_vitesse.set_xlabel("Nombre de corps N")
+    ax_vitesse.set_ylabel("Pas par seconde")
+    ax_memoire.set_xlabel("Nombre de corps N")
+    ax_memoire.set_ylabel("Pic de mémoire par pas (Mio)")
+    for ax in (ax_vitesse, ax_memoire):
+        ax.grid(True, which='both', alpha=0.3)
+    ax_vitesse.legend(fontsize=8)
+    fig.suptitle(f"Performances ({resultats['machine']['nombre_cpu']} CPU, {resultats['machine']['processeur']})")
+    fig.tight_layout()
+    fig.savefig(chemin, dpi=120)
+    return chemin
+
+if __name__ == "__main__":
+    noms_disponibles = list(cas_disponibles())
+    parser = argparse.ArgumentParser(description="Pas par seconde des moteurs de force et des intégrateurs en fonction de N")
+    parser.add_argument("--cas", nargs="*", default=noms_disponibles, choices=noms_disponibles, metavar="CAS",
+                        help=f"Cas à mesurer (par défaut : tous) : {', '.join(noms_disponibles)}")
+    parser.add_argument("--tailles", type=lambda texte: [int(n) for n in texte.split(",")], default=TAILLES, help="Valeurs de N, séparées par des virgules")
+    parser.add_argument("--pas-max", type=float, default=2.0, help="Durée maximale estimée d'un pas avant d'abandonner un cas (s)")
+    parser.add_argument("--duree", type=float, default=DUREE_MESURE, help="Durée minimale de mesure par point (s)")
+    parser.add_argument("--sortie", default="vitesse.json", help="Fichier JSON des résultats")
+    parser.add_argument("--graphique", default="vitesse.png", help="Image des courbes d'échelle (vide pour ne pas tracer)")
+    arguments = parser.parse_args()
+
+    resultats = executer(arguments.cas, arguments.tailles, arguments.pas_max, arguments.duree)
+    print("Résultats :", ecrire_json(resultats, arguments.sortie))
+    if arguments.graphique:
+        print("Courbes :", tracer(resultats, arguments.graphique))
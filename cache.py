@@ -0,0 +1,208 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from collections import namedtuple
+import numpy as np
+from moteur import VERSION_MOTEUR
+from etat import SystemState
+from flux import simulate
+from scenario import construire_etat
+from archive import EcrivainArchive, LecteurArchive
+
+# Cache des résultats de simulation, adressé par contenu : la clé est l'empreinte SHA-256 du scénario
+# canonique (JSON trié), des options qui changent les trajectoires et de la version du moteur.
+# Chaque entrée est un dossier contenant l'archive compressée de la trajectoire, l'état final et le scénario.
+# Les entrées les moins récemment utilisées sont supprimées quand la taille totale dépasse le budget disque.
+# Une simulation plus longue qu'une entrée en cache (même scénario, plus d'étapes) reprend depuis l'état
+# final de l'entrée la plus longue : seule la fin est calculée, et le début de l'archive est recopié.
+
+DOSSIER_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "simulateur-espace")
+BUDGET_DISQUE = 2**30  # Octets (1 Gio)
+FICHIER_ARCHIVE = "trajectoire.traj"
+FICHIER_ETAT = "etat_final.npz"
+FICHIER_SCENARIO = "scenario.json"
+PREFIXE_EN_COURS = ".en-cours-"  # Dossiers temporaires des entrées en cours d'écriture
+
+# Options de calcul qui ne changent pas les résultats (à l'arrondi près) et n'entrent pas dans la clé
+# (transmises par simulate jusqu'au noyau de forces)
+OPTIONS_SANS_EFFET = ("moteur_calcul", "taille_bloc", "nombre_threads")
+
+# Résultat d'une simulation : clé, chemin de l'archive, état final (etat.SystemState), vrai si lu dans le cache
+Resultat = namedtuple("Resultat", ["cle", "archive", "etat_final", "en_cache"])
+
+# Fonction pour normaliser les valeurs avant de les écrire : tous les nombres (int, float, scalaires NumPy)
+# deviennent des float, pour que 432000 et 432000.0 donnent le même texte ; les tableaux NumPy deviennent des listes
+def _normaliser(valeur):
+    if isinstance(valeur, dict):
+        return {str(nom): _normaliser(element) for nom, element in valeur.items()}
+    if isinstance(valeur, (list, tuple, np.ndarray)):
+        return [_normaliser(element) for element in valeur]
+    if isinstance(valeur, (bool, np.bool_)):
+        return bool(valeur)
+    if isinstance(valeur, (int, float, np.integer, np.floating)):
+        valeur = float(valeur)
+        if not np.isfinite(valeur):
+            raise ValueError(f"Valeur non finie dans le scénario : {valeur}")
+        return valeur
+    return valeur
+
+# Fonction pour écrire le scénario (et les options) sous une forme canonique : même contenu, même texte
+def scenario_canonique(scenario, every=1, encodage="delta", erreur_max=None, **options):
+    options = {nom: valeur for nom, valeur in options.items() if nom not in OPTIONS_SANS_EFFET}
+    contenu = {
+        "scenario": scenario, "every": every, "options": options, "version_moteur": VERSION_MOTEUR,
+        "archive": {"encodage": encodage, "erreur_max": erreur_max},
+    }
+    return json.dumps(_normaliser(contenu), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+# Fonction pour calculer la clé de cache d'une simulation
+def cle_scenario(scenario, every=1, **options):
+    return hashlib.sha256(scenario_canonique(scenario, every, **options).encode('utf-8')).hexdigest()
+
+# Fonction pour calculer la clé commune à toutes les durées d'un même scénario (nombre d'étapes exclu)
+def cle_prefixe(scenario, every=1, **options):
+    return cle_scenario({nom: valeur for nom, valeur in scenario.items() if nom != "etapes"}, every, **options)
+
+# Fonction pour sauvegarder un état (etat.SystemState) dans un fichier .npz
+def sauvegarder_etat(state, chemin):
+    pas_interne = np.nan if state.pas_interne is None else state.pas_interne
+    np.savez(chemin, noms=np.array(state.noms), masses=state.masses, positions=state.positions,
+             vitesses=state.vitesses, temps=state.temps, pas_interne=pas_interne)
+
+# Fonction pour recréer un état sauvegardé par sauvegarder_etat
+def charger_etat(chemin):
+    with np.load(chemin) as donnees:
+        state = SystemState(dimension=donnees["positions"].shape[1])
+        for nom, masse, position, vitesse in zip(donnees["noms"], donnees["masses"], donnees["positions"], donnees["vitesses"]):
+            state.ajouter(str(nom), masse, position, vitesse)
+        state.temps = float(donnees["temps"])
+        pas_interne = float(donnees["pas_interne"])
+        state.pas_interne = None if np.isnan(pas_interne) else pas_interne
+    return state
+
+# Classe pour exécuter des scénarios en réutilisant les résultats déjà calculés
+class CacheResultats:
+    def __init__(self, dossier=DOSSIER_CACHE, budget=BUDGET_DISQUE):
+        self.dossier = dossier
+        self.budget = budget
+        os.makedirs(dossier, exist_ok=True)
+
+    def chemin(self, cle):
+        return os.path.join(self.dossier, cle)
+
+    # Clés des entrées présentes, de la moins récemment utilisée à la plus récente
+    # (les dossiers .en-cours-* sont des entrées en cours d'écriture : ils ne sont ni lus ni supprimés)
+    def entrees(self):
+        cles = [
+            nom for nom in os.listdir(self.dossier)
+            if not nom.startswith(PREFIXE_EN_COURS) and os.path.isfile(os.path.join(self.dossier, nom, FICHIER_ETAT))
+        ]
+        return sorted(cles, key=lambda cle: os.path.getmtime(self.chemin(cle)))
+
+    # Description d'une entrée : scénario canonique, clé de préfixe et nombre d'étapes
+    def description(self, cle):
+        with open(os.path.join(self.chemin(cle), FICHIER_SCENARIO), encoding='utf-8') as fichier:
+            return json.load(fichier)
+
+    # Résultat en cache pour ce scénario, ou None (une lecture compte comme une utilisation)
+    def obtenir(self, scenario, every=1, **options):
+        cle = cle_scenario(scenario, every, **options)
+        return self._lire(cle)
+
+    # Clé et nombre d'étapes de l'entrée la plus longue dont la simulation demandée est le prolongement,
+    # ou None (les instantanés doivent rester alignés : son nombre d'étapes doit être un multiple de every)
+    def trouver_prefixe(self, scenario, every=1, **options):
+        prefixe = cle_prefixe(scenario, every, **options)
+        meilleure = None
+        for cle in self.entrees():
+            try:
+                description = self.description(cle)
+            except (OSError, ValueError):
+                continue
+            etapes = description["etapes"]
+            if description["cle_prefixe"] == prefixe and etapes < scenario["etapes"] and etapes % every == 0:
+                if meilleure is None or etapes > meilleure[1]:
+                    meilleure = (cle, etapes)
+        return meilleure
+
+    def _lire(self, cle):
+        dossier = self.chemin(cle)
+        if not os.path.isfile(os.path.join(dossier, FICHIER_ETAT)):
+            return None
+        os.utime(dossier)
+        return Resultat(cle, os.path.join(dossier, FICHIER_ARCHIVE), charger_etat(os.path.join(dossier, FICHIER_ETAT)), True)
+
+    # Résultat du scénario : lu dans le cache s'il existe, prolongé depuis une entrée plus courte,
+    # ou calculé entièrement, puis mis en cache
+    # (options d'archive : encodage, erreur_max, taille_bloc_archive ; autres options : celles de simulate)
+    def executer(self, scenario, every=1, encodage="delta", erreur_max=None, taille_bloc_archive=None, **options):
+        options_cle = dict(options, encodage=encodage, erreur_max=erreur_max)
+        cle = cle_scenario(scenario, every, **options_cle)
+        resultat = self._lire(cle)
+        if resultat is not None:
+            return resultat
+        prefixe = self.trouver_prefixe(scenario, every, **options_cle)
+
+        # Écriture dans un dossier temporaire puis renommage : une entrée n'est jamais visible à moitié écrite
+        temporaire = tempfile.mkdtemp(dir=self.dossier, prefix=PREFIXE_EN_COURS)
+        try:
+            if prefixe is None:
+                state, etapes_faites = construire_etat(scenario), 0
+            else:
+                os.utime(self.chemin(prefixe[0]))
+                state, etapes_faites = charger_etat(os.path.join(self.chemin(prefixe[0]), FICHIER_ETAT)), prefixe[1]
+
+            options_archive = {"encodage": encodage, "erreur_max": erreur_max, "metadonnees": {"cle": cle}}
+            if taille_bloc_archive is not None:
+                options_archive["taille_bloc"] = taille_bloc_archive
+            with EcrivainArchive(os.path.join(temporaire, FICHIER_ARCHIVE), state, **options_archive) as ecrivain:
+                if prefixe is not None:
+                    with LecteurArchive(os.path.join(self.chemin(prefixe[0]), FICHIER_ARCHIVE)) as lecteur:
+                        ecrivain.copier(lecteur)
+                instantanes = simulate(state, scenario["dt"], scenario["etapes"] - etapes_faites, every=every, dt_initial=state.pas_interne, **options)
+                for instantane in instantanes:
+                    ecrivain.ajouter(instantane._replace(etape=instantane.etape + etapes_faites))
+
+            sauvegarder_etat(state, os.path.join(temporaire, FICHIER_ETAT))
+            description = {
+                "canonique": scenario_canonique(scenario, every, **options_cle),
+                "cle_prefixe": cle_prefixe(scenario, every, **options_cle),
+                "etapes": int(scenario["etapes"]),
+            }
+            with open(os.path.join(temporaire, FICHIER_SCENARIO), 'w', encoding='utf-8') as fichier:
+                json.dump(description, fichier, ensure_ascii=False)
+            try:
+                os.replace(temporaire, self.chemin(cle))
+            except OSError:
+                shutil.rmtree(temporaire)  # Calculé en même temps par un autre processus : on garde le sien
+        except BaseException:
+            shutil.rmtree(temporaire, ignore_errors=True)
+            raise
+
+        self.evincer(garder=cle)
+        return Resultat(cle, os.path.join(self.chemin(cle), FICHIER_ARCHIVE), state, False)
+
+    # Taille d'une entrée sur le disque (octets)
+    def taille(self, cle):
+        dossier = self.chemin(cle)
+        return sum(os.path.getsize(os.path.join(dossier, nom)) for nom in os.listdir(dossier))
+
+    # Supprimer les entrées les moins récemment utilisées jusqu'à respecter le budget disque
+    def evincer(self, garder=None):
+        cles = self.entrees()
+        tailles = {cle: self.taille(cle) for cle in cles}
+        total = sum(tailles.values())
+        for cle in cles:
+            if total <= self.budget:
+                break
+            if cle == garder:
+                continue
+            shutil.rmtree(self.chemin(cle), ignore_errors=True)
+            total -= tailles[cle]
+        return total
+
+    def vider(self):
+        for cle in self.entrees():
+            shutil.rmtree(self.chemin(cle), ignore_errors=True)
@@ -0,0 +1,98 @@
+from collections import namedtuple
+import numpy as np
+
+# Conversion vectorisée vecteurs d'état <-> éléments képlériens dans le plan de la simulation.
+# Les tableaux ont une forme (..., 2) pour les positions et vitesses (corps, instants, ou les deux)
+# et (...) pour les éléments. mu = G·M du corps central (km^3/s^2), scalaire ou tableau compatible.
+
+# Éléments d'orbite plane :
+# a : demi-grand axe (km, négatif pour une hyperbole), e : excentricité,
+# omega : argument du périapse (rad, depuis l'axe x), M : anomalie moyenne (rad),
+# periapse : distance au périapse (km), sens : +1 orbite directe, -1 rétrograde
+Elements = namedtuple("Elements", ["a", "e", "omega", "M", "periapse", "sens"])
+
+TOLERANCE_KEPLER = 1e-12
+ITERATIONS_KEPLER = 50
+
+# Fonction pour convertir des vecteurs d'état (relatifs au corps central) en éléments képlériens
+def etat_vers_elements(positions, vitesses, mu):
+    positions = np.asarray(positions, dtype='float64')
+    vitesses = np.asarray(vitesses, dtype='float64')
+    x, y = positions[..., 0], positions[..., 1]
+    r = np.hypot(x, y)
+    v2 = np.einsum('...k,...k->...', vitesses, vitesses)
+    rv = np.einsum('...k,...k->...', positions, vitesses)
+    moment = x * vitesses[..., 1] - y * vitesses[..., 0]  # Moment cinétique (composante z)
+    sens = np.where(moment < 0, -1, 1)
+
+    # Vecteur excentricité
+    vecteur_e = ((v2 - mu / r)[..., np.newaxis] * positions - rv[..., np.newaxis] * vitesses) / np.asarray(mu)[..., np.newaxis]
+    e = np.hypot(vecteur_e[..., 0], vecteur_e[..., 1])
+    a = 1 / (2 / r - v2 / mu)
+
+    # Orbite quasi circulaire : périapse indéfini, on mesure l'anomalie depuis l'axe x
+    circulaire = e < 1e-12
+    omega = np.where(circulaire, 0.0, np.arctan2(vecteur_e[..., 1], vecteur_e[..., 0]))
+    anomalie_vraie = sens * (np.arctan2(y, x) - omega)
+
+    elliptique = e < 1
+    with np.errstate(invalid='ignore'):
+        anomalie_excentrique = np.arctan2(np.sqrt(np.maximum(1 - e**2, 0)) * np.sin(anomalie_vraie), e + np.cos(anomalie_vraie))
+        M_ellipse = anomalie_excentrique - e * np.sin(anomalie_excentrique)
+        anomalie_hyperbolique = 2 * np.arctanh(np.sqrt(np.maximum(e - 1, 0) / (e + 1)) * np.tan(anomalie_vraie / 2))
+        M_hyperbole = e * np.sinh(anomalie_hyperbolique) - anomalie_hyperbolique
+    M = np.where(elliptique, np.mod(M_ellipse, 2 * np.pi), M_hyperbole)
+
+    return Elements(a, e, np.mod(omega, 2 * np.pi), M, a * (1 - e), sens)
+
+# Fonction pour résoudre l'équation de Kepler (E - e sin E = M, ou e sinh F - F = M pour e > 1) par Newton
+def resoudre_kepler(M, e):
+    M, e = np.broadcast_arrays(np.asarray(M, dtype='float64'), np.asarray(e, dtype='float64'))
+    elliptique = e < 1
+    M_ellipse = np.mod(M + np.pi, 2 * np.pi) - np.pi  # Ramené dans [-pi, pi[
+    anomalie = np.where(elliptique, np.where(e > 0.8, np.pi * np.sign(M_ellipse), M_ellipse + e * np.sin(M_ellipse)), np.arcsinh(M / np.maximum(e, 1)))
+
+    for _ in range(ITERATIONS_KEPLER):
+        with np.errstate(over='ignore', invalid='ignore'):
+            correction = np.where(
+                elliptique,
+                (anomalie - e * np.sin(anomalie) - M_ellipse) / (1 - e * np.cos(anomalie)),
+                (e * np.sinh(anomalie) - anomalie - M) / (e * np.cosh(anomalie) - 1),
+            )
+        anomalie = anomalie - correction
+        if np.all(np.abs(correction) < TOLERANCE_KEPLER):
+            break
+    return anomalie
+
+# Fonction pour convertir des éléments képlériens en vecteurs d'état (relatifs au corps central)
+def elements_vers_etat(a, e, omega, M, mu, sens=1):
+    a, e, omega, M, mu, sens = np.broadcast_arrays(*(np.asarray(valeur, dtype='float64') for valeur in (a, e, omega, M, mu, sens)))
+    anomalie = resoudre_kepler(M, e)
+    elliptique = e < 1
+    demi_axe = np.abs(a)
+
+    with np.errstate(invalid='ignore'):
+        # Coordonnées dans le repère du périapse
+        cos_e, sin_e = np.where(elliptique, np.cos(anomalie), np.cosh(anomalie)), np.where(elliptique, np.sin(anomalie), np.sinh(anomalie))
+        facteur = np.sqrt(np.abs(1 - e**2))
+        x = np.where(elliptique, demi_axe * (cos_e - e), demi_axe * (e - cos_e))
+        y = demi_axe * facteur * sin_e
+        r = np.where(elliptique, demi_axe * (1 - e * cos_e), demi_axe * (e * cos_e - 1))
+        vitesse = np.sqrt(mu * demi_axe) / r
+        vx = -vitesse * sin_e
+        vy = vitesse * facteur * cos_e
+
+    # Sens de parcours, puis rotation de omega
+    y, vy = sens * y, sens * vy
+    cos_w, sin_w = np.cos(omega), np.sin(omega)
+    positions = np.stack([cos_w * x - sin_w * y, sin_w * x + cos_w * y], axis=-1)
+    vitesses = np.stack([cos_w * vx - sin_w * vy, sin_w * vx + cos_w * vy], axis=-1)
+    return positions, vitesses
+
+# Fonction pour calculer les éléments de tous les corps par rapport au corps de la ligne `indice_reference`
+# (mu = G·(m_reference + m_corps) pour chaque corps ; la ligne de référence elle-même donne des valeurs non définies)
+def elements_relatifs(positions, vitesses, gm, indice_reference=0):
+    relatives = positions - positions[..., indice_reference:indice_reference + 1, :]
+    vitesses_relatives = vitesses - vitesses[..., indice_reference:indice_reference + 1, :]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return etat_vers_elements(relatives, vitesses_relatives, gm[indice_reference] + gm)
@@ -0,0 +1,152 @@
+import numpy as np
+from moteur import G, avancer_hermite
+
+# Capacité initiale des tableaux de l'état (doublée à chaque dépassement)
+CAPACITE_INITIALE = 16
+
+# Classe pour représenter l'état du système en tableaux contigus (une ligne par corps).
+# Les corps peuvent être ajoutés, retirés ou fusionnés en cours de simulation : les tableaux
+# sont surdimensionnés (capacité doublée si besoin) et un retrait déplace la dernière ligne
+# dans la place libérée. Chaque corps garde un identifiant stable, indépendant de sa ligne.
+class SystemState:
+    def __init__(self, dimension=2, capacite=CAPACITE_INITIALE):
+        self.dimension = dimension
+        self._positions = np.zeros((capacite, dimension), dtype='float64')
+        self._vitesses = np.zeros((capacite, dimension), dtype='float64')
+        self._forces = np.zeros((capacite, dimension), dtype='float64')
+        self._masses = np.zeros(capacite, dtype='float64')
+        self._ids = np.zeros(capacite, dtype='int64')  # Ligne -> identifiant
+        self._lignes = {}  # Identifiant -> ligne
+        self.noms = []  # Ligne -> nom
+        self.identifiants = {}  # Table nom -> identifiant
+        self._prochain_id = 0
+        self.temps = 0.0  # Temps simulé (s)
+        self.pas_interne = None  # Dernier pas interne du moteur, pour reprendre une simulation à l'identique
+        self._gm = None  # Cache G·m et indices des corps massifs, invalidé quand les masses changent
+        self._sources = None
+
+    def __len__(self):
+        return len(self.noms)
+
+    @property
+    def capacite(self):
+        return len(self._masses)
+
+    # Vues sur les lignes actives (modifiables en place par les moteurs)
+    @property
+    def positions(self):
+        return self._positions[:len(self)]
+
+    @property
+    def vitesses(self):
+        return self._vitesses[:len(self)]
+
+    @property
+    def forces(self):
+        return self._forces[:len(self)]
+
+    @property
+    def masses(self):
+        return self._masses[:len(self)]
+
+    @property
+    def ids(self):
+        return self._ids[:len(self)]
+
+    # Paramètres gravitationnels G·m (forme accélération), calculés une seule fois
+    @property
+    def gm(self):
+        if self._gm is None:
+            self._gm = G * self.masses
+        return self._gm
+
+    # Indices des corps massifs, seuls à exercer une force
+    @property
+    def sources(self):
+        if self._sources is None:
+            self._sources = np.flatnonzero(self.masses)
+        return self._sources
+
+    # Invalider les tables en cache après un changement de masse
+    def _invalider_masses(self):
+        self._gm = None
+        self._sources = None
+
+    # Modifier la masse d'un corps (à utiliser plutôt qu'une écriture directe dans masses)
+    def modifier_masse(self, identifiant, masse):
+        self._masses[self._lignes[identifiant]] = masse
+        self._invalider_masses()
+
+    # Doubler la capacité des tableaux (coût amorti constant par ajout)
+    def _agrandir(self):
+        capacite = 2 * self.capacite
+        for nom in ("_positions", "_vitesses", "_forces", "_masses", "_ids"):
+            ancien = getattr(self, nom)
+            nouveau = np.zeros((capacite,) + ancien.shape[1:], dtype=ancien.dtype)
+            nouveau[:len(self)] = ancien[:len(self)]
+            setattr(self, nom, nouveau)
+
+    # Ajouter un corps et renvoyer son identifiant
+    def ajouter(self, nom, masse, position, vitesse):
+        if nom in self.identifiants:
+            raise ValueError(f"Un corps nommé '{nom}' existe déjà.")
+        if len(self) == self.capacite:
+            self._agrandir()
+
+        ligne = len(self)
+        identifiant = self._prochain_id
+        self._prochain_id += 1
+
+        self._positions[ligne] = position
+        self._vitesses[ligne] = vitesse
+        self._forces[ligne] = 0.0
+        self._masses[ligne] = masse
+        self._ids[ligne] = identifiant
+        self._lignes[identifiant] = ligne
+        self.noms.append(nom)
+        self.identifiants[nom] = identifiant
+        self._invalider_masses()
+        return identifiant
+
+    # Retirer un corps : la dernière ligne prend sa place (compactage sans réallocation)
+    def retirer(self, identifiant):
+        ligne = self._lignes.pop(identifiant)
+        derniere = len(self) - 1
+        del self.identifiants[self.noms[ligne]]
+
+        if ligne != derniere:
+            for tableau in (self._positions, self._vitesses, self._forces, self._masses, self._ids):
+                tableau[ligne] = tableau[derniere]
+            self.noms[ligne] = self.noms[derniere]
+            self._lignes[int(self._ids[ligne])] = ligne
+        self.noms.pop()
+        self._invalider_masses()
+
+    # Fusionner deux corps (collision inélastique) : le premier garde son identifiant
+    # et reçoit la masse totale, le centre de masse et la quantité de mouvement totale
+    def fusionner(self, identifiant, autre_identifiant):
+        ligne, autre = self._lignes[identifiant], self._lignes[autre_identifiant]
+        masse, autre_masse = self._masses[ligne], self._masses[autre]
+        masse_totale = masse + autre_masse
+
+        if masse_totale > 0:
+            self._positions[ligne] = (masse * self._positions[ligne] + autre_masse * self._positions[autre]) / masse_totale
+            self._vitesses[ligne] = (masse * self._vitesses[ligne] + autre_masse * self._vitesses[autre]) / masse_totale
+        self._masses[ligne] = masse_totale
+        self.retirer(autre_identifiant)
+        return identifiant
+
+    # Ligne actuelle d'un corps à partir de son identifiant
+    def ligne(self, identifiant):
+        return self._lignes[identifiant]
+
+    # Ligne actuelle d'un corps à partir de son nom
+    def indice(self, nom):
+        return self._lignes[self.identifiants[nom]]
+
+    # Avancer l'état d'une durée donnée avec le moteur de Hermite, en réutilisant les tables en cache
+    def avancer_hermite(self, duree, dt_initial=None, **options):
+        dt_suivant = avancer_hermite(self.positions, self.vitesses, self.masses, duree, dt_initial, gm=self.gm, sources=self.sources, temps_initial=self.temps, **options)
+        self.temps += duree
+        self.pas_interne = dt_suivant
+        return dt_suivant
@@ -0,0 +1,143 @@
+import numpy as np
+
+# Détection d'événements (passages au périhélie, conjonctions, rapprochements...) pendant la simulation.
+# Une fonction d'événement g(temps, positions, vitesses) renvoie une valeur par corps ; un événement a lieu
+# quand une composante change de signe. Les changements de signe sont repérés à chaque sous-pas de la
+# sortie dense, puis l'instant est affiné par recherche de racine sur cette même sortie dense.
+
+# Table compacte des événements détectés
+TYPE_EVENEMENT = np.dtype([("evenement", 'int16'), ("id", 'int64'), ("temps", 'float64'), ("direction", 'int8')])
+
+# Classe pour décrire un type d'événement
+class Evenement:
+    # direction : +1 (g passe de - à +), -1 (de + à -) ou 0 (les deux)
+    # condition : fonction (temps, positions, vitesses) -> booléens par corps, évaluée à l'instant de l'événement
+    def __init__(self, nom, fonction, direction=0, condition=None):
+        self.nom = nom
+        self.fonction = fonction
+        self.direction = direction
+        self.condition = condition
+
+# Fonction pour créer l'événement de passage au périhélie (vitesse radiale nulle, croissante)
+# autour du corps de la ligne `indice_reference`
+def perihelie(indice_reference=0):
+    def vitesse_radiale(temps, positions, vitesses):
+        return np.einsum('ij,ij->i', positions - positions[indice_reference], vitesses - vitesses[indice_reference])
+    return Evenement("périhélie", vitesse_radiale, direction=+1)
+
+# Fonction pour créer l'événement de passage à l'aphélie
+def aphelie(indice_reference=0):
+    evenement = perihelie(indice_reference)
+    return Evenement("aphélie", evenement.fonction, direction=-1)
+
+# Fonction pour créer l'événement de conjonction avec le corps `indice_corps`, vue depuis `indice_reference`
+# (même direction apparente : le produit vectoriel 2D des positions relatives s'annule, le produit scalaire est positif)
+def conjonction(indice_corps, indice_reference=0):
+    def produit_vectoriel(temps, positions, vitesses):
+        relatives = positions - positions[indice_reference]
+        return relatives[:, 0] * relatives[indice_corps, 1] - relatives[:, 1] * relatives[indice_corps, 0]
+
+    def meme_direction(temps, positions, vitesses):
+        relatives = positions - positions[indice_reference]
+        return relatives @ relatives[indice_corps] > 0
+
+    return Evenement("conjonction", produit_vectoriel, direction=0, condition=meme_direction)
+
+# Fonction pour créer l'événement de rapprochement maximal avec le corps `indice_corps`,
+# enregistré seulement si la distance est inférieure à `rayon` (km)
+def rapprochement(indice_corps, rayon):
+    def vitesse_relative_radiale(temps, positions, vitesses):
+        return np.einsum('ij,ij->i', positions - positions[indice_corps], vitesses - vitesses[indice_corps])
+
+    def proche(temps, positions, vitesses):
+        return np.linalg.norm(positions - positions[indice_corps], axis=1) < rayon
+
+    return Evenement("rapprochement", vitesse_relative_radiale, direction=+1, condition=proche)
+
+# Fonction pour affiner l'instant où la composante `indice` de g s'annule entre ta et tb (méthode Illinois)
+def trouver_racine(fonction, indice, ta, tb, ga, gb, tolerance=1.0, iterations_max=60):
+    for _ in range(iterations_max):
+        if abs(tb - ta) <= tolerance or gb == ga:
+            break
+        t = tb - gb * (tb - ta) / (gb - ga)
+        g = fonction(t)[indice]
+        if g == 0:
+            return t
+        if g * gb < 0:
+            ta, ga = tb, gb
+        else:
+            ga /= 2  # Illinois : évite qu'une borne reste figée
+        tb, gb = t, g
+    return tb
+
+# Classe pour suivre des événements au fil des instantanés produits par flux.simulate(..., dense=True)
+class DetecteurEvenements:
+    def __init__(self, evenements, tolerance=1.0):
+        self.evenements = list(evenements)
+        self.tolerance = tolerance  # Précision sur l'instant (s)
+        self._table = np.zeros(64, dtype=TYPE_EVENEMENT)
+        self._nombre = 0
+        self._precedent = None  # (ids, temps, valeurs de chaque fonction) au dernier sous-pas traité
+
+    # Événements détectés jusqu'ici (vue sur la table)
+    @property
+    def table(self):
+        return self._table[:self._nombre]
+
+    def _enregistrer(self, numero, ids, temps, direction):
+        nombre = len(temps)
+        while self._nombre + nombre > len(self._table):
+            self._table = np.concatenate([self._table, np.zeros(len(self._table), dtype=TYPE_EVENEMENT)])
+        nouveaux = self._table[self._nombre:self._nombre + nombre]
+        nouveaux["evenement"] = numero
+        nouveaux["id"] = ids
+        nouveaux["temps"] = temps
+        nouveaux["direction"] = direction
+        self._nombre += nombre
+
+    # Traiter un instantané (avec sortie dense) et renvoyer les événements trouvés pendant ses pas
+    def traiter(self, instantane):
+        dense = instantane.dense
+        if dense is None:
+            raise ValueError("La détection d'événements nécessite une sortie dense (simulate(..., dense=True)).")
+        debut = self._nombre
+
+        # Valeurs au début de l'intervalle : reprises du sous-pas précédent si les corps n'ont pas changé
+        if self._precedent is None or not np.array_equal(self._precedent[0], instantane.ids):
+            t0 = dense.debut
+            x0, v0 = dense.evaluer(t0)
+            valeurs0 = [evenement.fonction(t0, x0, v0) for evenement in self.evenements]
+        else:
+            t0, valeurs0 = self._precedent[1], self._precedent[2]
+
+        for segment in dense.segments:
+            t1, x1, v1 = segment[1], segment[5], segment[6]
+            valeurs1 = [evenement.fonction(t1, x1, v1) for evenement in self.evenements]
+            for numero, evenement in enumerate(self.evenements):
+                self._detecter(numero, evenement, dense, instantane.ids, t0, t1, valeurs0[numero], valeurs1[numero])
+            t0, valeurs0 = t1, valeurs1
+
+        self._precedent = (instantane.ids.copy(), t0, valeurs0)
+        return self._table[debut:self._nombre]
+
+    def _detecter(self, numero, evenement, dense, ids, t0, t1, g0, g1):
+        montees = (g0 < 0) & (g1 >= 0)
+        descentes = (g0 > 0) & (g1 <= 0)
+        if evenement.direction > 0:
+            candidats = montees
+        elif evenement.direction < 0:
+            candidats = descentes
+        else:
+            candidats = montees | descentes
+        indices = np.flatnonzero(candidats)
+        if len(indices) == 0:
+            return
+
+        def fonction(t):
+            return evenement.fonction(t, *dense.evaluer(t))
+
+        temps = np.array([trouver_racine(fonction, i, t0, t1, g0[i], g1[i], self.tolerance) for i in indices])
+        if evenement.condition is not None:
+            gardes = np.array([evenement.condition(t, *dense.evaluer(t))[i] for i, t in zip(indices, temps)], dtype=bool)
+            indices, temps = indices[gardes], temps[gardes]
+        self._enregistrer(numero, ids[indices], temps, np.where(montees[indices], 1, -1))
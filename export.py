@@ -0,0 +1,100 @@
+import json
+import numpy as np
+
+# Export des résultats au format Apache Arrow (IPC) et Parquet, sans passer par des objets Python :
+# les colonnes sont construites directement sur les tableaux NumPy (sans copie quand ils sont contigus),
+# les noms des corps sont encodés en dictionnaire, et les trajectoires sont écrites bloc par bloc
+# (un groupe de lignes Parquet ou un lot Arrow par bloc de temps de l'archive).
+
+# PyArrow optionnel : seul ce module en a besoin
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+def _verifier_pyarrow():
+    if pa is None:
+        raise ImportError("L'export Arrow/Parquet nécessite le module 'pyarrow' (pip install pyarrow).")
+
+# Colonne de vecteurs (n, d) -> liste de taille fixe d, sans copie si le tableau est contigu
+def _colonne_vecteurs(vecteurs):
+    vecteurs = np.ascontiguousarray(vecteurs, dtype='float64')
+    return pa.FixedSizeListArray.from_arrays(pa.array(vecteurs.reshape(-1)), vecteurs.shape[-1])
+
+# Colonne de noms encodée en dictionnaire : seuls les indices (int32) sont répétés
+def _colonne_noms(indices, noms):
+    return pa.DictionaryArray.from_arrays(pa.array(np.asarray(indices, dtype='int32')), pa.array(list(noms), pa.string()))
+
+# Table de l'état courant d'une simulation (etat.SystemState) : un corps par ligne
+def table_etat(state):
+    _verifier_pyarrow()
+    return pa.table({
+        "id": pa.array(state.ids),
+        "nom": _colonne_noms(np.arange(len(state)), state.noms),
+        "masse": pa.array(state.masses),
+        "position": _colonne_vecteurs(state.positions),
+        "vitesse": _colonne_vecteurs(state.vitesses),
+    }, metadata={"temps": str(state.temps)})
+
+# Table d'un tableau NumPy structuré (événements, fenêtres de proximité...) ; les colonnes données dans
+# `dictionnaires` (nom de colonne -> liste de libellés) contiennent des codes et sont encodées en dictionnaire
+# (ex: table_structuree(detecteur.table, {"evenement": [e.nom for e in detecteur.evenements]}))
+def table_structuree(tableau, dictionnaires=None):
+    _verifier_pyarrow()
+    dictionnaires = dictionnaires or {}
+    colonnes = {}
+    for nom in tableau.dtype.names:
+        colonne = np.ascontiguousarray(tableau[nom])
+        colonnes[nom] = _colonne_noms(colonne, dictionnaires[nom]) if nom in dictionnaires else pa.array(colonne)
+    return pa.table(colonnes)
+
+# Table des instantanés d'un bloc de l'archive : une ligne par (instant, corps)
+def table_bloc(lecteur, numero_bloc):
+    _verifier_pyarrow()
+    etapes = lecteur.lire_tableau(numero_bloc, "etapes")
+    temps = lecteur.lire_tableau(numero_bloc, "temps")
+    positions = lecteur.lire_tableau(numero_bloc, "positions")
+    nombre_instants, nombre_corps, dimension = positions.shape
+    colonnes = {
+        "etape": pa.array(np.repeat(etapes, nombre_corps)),
+        "temps": pa.array(np.repeat(temps, nombre_corps)),
+        "id": pa.array(np.tile(lecteur.ids, nombre_instants)),
+        "nom": _colonne_noms(np.tile(np.arange(nombre_corps), nombre_instants), lecteur.noms),
+        "position": _colonne_vecteurs(positions.reshape(-1, dimension)),
+    }
+    if "vitesses" in lecteur.blocs[numero_bloc]["tableaux"]:
+        colonnes["vitesse"] = _colonne_vecteurs(lecteur.lire_tableau(numero_bloc, "vitesses").reshape(-1, dimension))
+    return pa.table(colonnes)
+
+# Fonction pour écrire une table : Parquet si le chemin finit par .parquet, sinon fichier Arrow IPC
+def ecrire_table(table, chemin):
+    _verifier_pyarrow()
+    if str(chemin).endswith(".parquet"):
+        pq.write_table(table, chemin)
+    else:
+        with pa.ipc.new_file(chemin, table.schema) as ecrivain:
+            ecrivain.write_table(table)
+    return chemin
+
+# Fonction pour exporter toutes les trajectoires d'une archive (archive.LecteurArchive), bloc par bloc :
+# la mémoire utilisée ne dépend que de la taille d'un bloc, pas de la longueur de la simulation
+def exporter_trajectoires(lecteur, chemin):
+    _verifier_pyarrow()
+    metadonnees = {"unites": json.dumps(lecteur.index["unites"]), "metadonnees": json.dumps(lecteur.metadonnees)}
+    ecrivain = None
+    try:
+        for numero in range(len(lecteur.blocs)):
+            table = table_bloc(lecteur, numero)
+            if ecrivain is None:
+                schema = table.schema.with_metadata(metadonnees)
+                ecrivain = pq.ParquetWriter(chemin, schema) if str(chemin).endswith(".parquet") else pa.ipc.new_file(chemin, schema)
+            table = table.replace_schema_metadata(metadonnees)
+            if isinstance(ecrivain, pq.ParquetWriter):
+                ecrivain.write_table(table, row_group_size=len(table))  # Un groupe de lignes par bloc de temps
+            else:
+                ecrivain.write_batch(table.combine_chunks().to_batches()[0])
+    finally:
+        if ecrivain is not None:
+            ecrivain.close()
+    return chemin
@@ -0,0 +1,254 @@
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import time
+from scenario import SYSTEME_SOLAIRE, construire_etat
+from flux import simulate
+from archive import EcrivainArchive
+from cache import sauvegarder_etat
+
+# File de travaux pour répartir des balayages de scénarios sur plusieurs machines, sans service externe :
+# une base SQLite (sur un disque partagé) contient les travaux, et des travailleurs sur n'importe quelle machine
+# viennent en prendre. Un travail pris est réservé par un bail de durée limitée, prolongé tant que le travailleur
+# avance ; si le travailleur disparaît, le bail expire et le travail est repris par un autre, dans la limite
+# du nombre de tentatives. Les résultats sont écrits au format d'archive (archive.py), sans interface graphique.
+
+ATTENTE, EN_COURS, TERMINE, ECHEC = "attente", "en_cours", "termine", "echec"
+DUREE_BAIL = 60.0  # Secondes
+TENTATIVES_MAX = 3
+PAUSE_FILE_VIDE = 5.0  # Secondes entre deux essais quand aucun travail n'est disponible
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS travaux (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    scenario TEXT NOT NULL,
+    options TEXT NOT NULL,
+    etat TEXT NOT NULL DEFAULT 'attente',
+    tentatives INTEGER NOT NULL DEFAULT 0,
+    tentatives_max INTEGER NOT NULL,
+    travailleur TEXT,
+    fin_bail REAL,
+    resultat TEXT,
+    erreur TEXT,
+    soumis REAL NOT NULL,
+    termine REAL
+);
+CREATE INDEX IF NOT EXISTS travaux_etat ON travaux (etat, id);
+"""
+
+# Erreur levée quand un travailleur a perdu le bail de son travail (expiré puis repris par un autre)
+class BailPerdu(Exception):
+    pass
+
+# Fonction pour donner un nom unique au travailleur courant
+def nom_travailleur():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+# Classe pour accéder à la file de travaux (un objet par processus)
+class FileTravaux:
+    def __init__(self, chemin):
+        self.chemin = chemin
+        self._connexion = sqlite3.connect(chemin, timeout=30, isolation_level=None)
+        self._connexion.row_factory = sqlite3.Row
+        # Journal de retour arrière (et non WAL) : le mode WAL repose sur une mémoire partagée propre à une machine
+        # et ne fonctionne pas sur un système de fichiers réseau partagé entre plusieurs machines
+        self._connexion.execute("PRAGMA journal_mode=DELETE")
+        self._connexion.executescript(SCHEMA)
+
+    # Exécuter des requêtes dans une transaction qui réserve l'écriture dès le début
+    def _transaction(self, fonction):
+        self._connexion.execute("BEGIN IMMEDIATE")
+        try:
+            resultat = fonction(self._connexion)
+        except BaseException:
+            self._connexion.execute("ROLLBACK")
+            raise
+        self._connexion.execute("COMMIT")
+        return resultat
+
+    # Ajouter un scénario à la file (options : celles de simulate et de l'archive) ; renvoie l'identifiant du travail
+    def soumettre(self, scenario, tentatives_max=TENTATIVES_MAX, **options):
+        curseur = self._connexion.execute(
+            "INSERT INTO travaux (scenario, options, tentatives_max, soumis) VALUES (?, ?, ?, ?)",
+            (json.dumps(scenario, ensure_ascii=False), json.dumps(options), tentatives_max, time.time()),
+        )
+        return curseur.lastrowid
+
+    # Prendre le plus ancien travail disponible (en attente, ou dont le bail a expiré) ; None si la file est vide
+    def prendre(self, travailleur=None, duree_bail=DUREE_BAIL):
+        travailleur = travailleur or nom_travailleur()
+
+        def reserver(connexion):
+            maintenant = time.time()
+            # Travaux abandonnés qui ont épuisé leurs tentatives
+            connexion.execute(
+                "UPDATE travaux SET etat = ?, erreur = 'bail expiré', termine = ? WHERE etat = ? AND fin_bail < ? AND tentatives >= tentatives_max",
+                (ECHEC, maintenant, EN_COURS, maintenant),
+            )
+            ligne = connexion.execute(
+                "SELECT * FROM travaux WHERE etat = ? OR (etat = ? AND fin_bail < ?) ORDER BY id LIMIT 1",
+                (ATTENTE, EN_COURS, maintenant),
+            ).fetchone()
+            if ligne is None:
+                return None
+            connexion.execute(
+                "UPDATE travaux SET etat = ?, travailleur = ?, fin_bail = ?, tentatives = tentatives + 1 WHERE id = ?",
+                (EN_COURS, travailleur, maintenant + duree_bail, ligne["id"]),
+            )
+            return self._travail(connexion.execute("SELECT * FROM travaux WHERE id = ?", (ligne["id"],)).fetchone())
+
+        return self._transaction(reserver)
+
+    # Prolonger le bail d'un travail ; lève BailPerdu si le travail a été repris par un autre travailleur
+    def prolonger(self, identifiant, travailleur, duree_bail=DUREE_BAIL):
+        curseur = self._connexion.execute(
+            "UPDATE travaux SET fin_bail = ? WHERE id = ? AND travailleur = ? AND etat = ?",
+            (time.time() + duree_bail, identifiant, travailleur, EN_COURS),
+        )
+        if curseur.rowcount == 0:
+            raise BailPerdu(f"Le travail {identifiant} n'est plus réservé par {travailleur}.")
+
+    # Marquer un travail comme terminé, avec le chemin de son résultat
+    def terminer(self, identifiant, travailleur, resultat):
+        curseur = self._connexion.execute(
+            "UPDATE travaux SET etat = ?, resultat = ?, termine = ?, fin_bail = NULL WHERE id = ? AND travailleur = ? AND etat = ?",
+            (TERMINE, resultat, time.time(), identifiant, travailleur, EN_COURS),
+        )
+        if curseur.rowcount == 0:
+            raise BailPerdu(f"Le travail {identifiant} n'est plus réservé par {travailleur}.")
+
+    # Signaler l'échec d'une tentative : le travail est remis en attente s'il lui reste des tentatives
+    def echouer(self, identifiant, travailleur, erreur):
+        self._connexion.execute(
+            "UPDATE travaux SET etat = CASE WHEN tentatives < tentatives_max THEN ? ELSE ? END, erreur = ?, fin_bail = NULL, "
+            "termine = CASE WHEN tentatives < tentatives_max THEN NULL ELSE ? END WHERE id = ? AND travailleur = ? AND etat = ?",
+            (ATTENTE, ECHEC, str(erreur), time.time(), identifiant, travailleur, EN_COURS),
+        )
+
+    def _travail(self, ligne):
+        travail = dict(ligne)
+        travail["scenario"] = json.loads(travail["scenario"])
+        travail["options"] = json.loads(travail["options"])
+        return travail
+
+    # Description d'un travail (dictionnaire), ou None
+    def travail(self, identifiant):
+        ligne = self._connexion.execute("SELECT * FROM travaux WHERE id = ?", (identifiant,)).fetchone()
+        return None if ligne is None else self._travail(ligne)
+
+    # Nombre de travaux dans chaque état
+    def compter(self):
+        comptes = dict.fromkeys((ATTENTE, EN_COURS, TERMINE, ECHEC), 0)
+        comptes.update(self._connexion.execute("SELECT etat, COUNT(*) FROM travaux GROUP BY etat").fetchall())
+        return comptes
+
+    def fermer(self):
+        self._connexion.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+# Classe pour prolonger le bail d'un travail à chaque pas de simulation (utilisée comme publicateur de flux.simulate,
+# appelé après chaque pas physique, et non seulement à chaque instantané archivé)
+class ProlongateurBail:
+    def __init__(self, file, identifiant, travailleur, duree_bail=DUREE_BAIL):
+        self.file = file
+        self.identifiant = identifiant
+        self.travailleur = travailleur
+        self.duree_bail = duree_bail
+        self.dernier = time.monotonic()
+
+    def publier(self, state, etape):
+        if time.monotonic() - self.dernier > self.duree_bail / 3:
+            self.file.prolonger(self.identifiant, self.travailleur, self.duree_bail)
+            self.dernier = time.monotonic()
+
+# Fonction pour exécuter un travail : simulation sans interface, archive et état final dans `dossier`.
+# Le bail est prolongé à chaque pas. Archive et état final sont écrits sous des noms propres au travailleur, puis
+# renommés : deux travailleurs qui se partagent un travail après l'expiration d'un bail n'écrivent jamais le même
+# fichier ; en cas d'erreur (ou de bail perdu), les fichiers partiels sont supprimés.
+# Renvoie le chemin de l'archive
+def executer_travail(file, travail, dossier, travailleur, duree_bail=DUREE_BAIL):
+    scenario, options = travail["scenario"], dict(travail["options"])
+    options_archive = {nom: options.pop(nom) for nom in ("encodage", "erreur_max", "taille_bloc_archive", "vitesses") if nom in options}
+    if "taille_bloc_archive" in options_archive:
+        options_archive["taille_bloc"] = options_archive.pop("taille_bloc_archive")
+    every = options.pop("every", 1)
+
+    base = os.path.join(dossier, f"travail-{travail['id']}")
+    temporaire = f"{base}.{travailleur.replace(':', '-')}.en-cours"
+    etat_temporaire = f"{temporaire}-etat_final.npz"
+    state = construire_etat(scenario)
+    prolongateur = ProlongateurBail(file, travail["id"], travailleur, duree_bail)
+    metadonnees = {"travail": travail["id"], "travailleur": travailleur}
+    try:
+        with EcrivainArchive(temporaire, state, metadonnees=metadonnees, **options_archive) as ecrivain:
+            for instantane in simulate(state, scenario["dt"], scenario["etapes"], every=every, publicateur=prolongateur, **options):
+                ecrivain.ajouter(instantane)
+        sauvegarder_etat(state, etat_temporaire)
+        os.replace(etat_temporaire, f"{base}-etat_final.npz")
+        os.replace(temporaire, f"{base}.traj")
+    except BaseException:
+        for chemin in (temporaire, etat_temporaire):
+            if os.path.exists(chemin):
+                os.remove(chemin)
+        raise
+    return f"{base}.traj"
+
+# Boucle d'un travailleur : prend et exécute des travaux jusqu'à ce que la file soit vide
+# (ou indéfiniment si attendre=True) ; renvoie le nombre de travaux terminés
+def travailler(chemin_file, dossier, travailleur=None, duree_bail=DUREE_BAIL, attendre=False, travaux_max=None):
+    travailleur = travailleur or nom_travailleur()
+    os.makedirs(dossier, exist_ok=True)
+    termines = 0
+    with FileTravaux(chemin_file) as file:
+        while travaux_max is None or termines < travaux_max:
+            travail = file.prendre(travailleur, duree_bail)
+            if travail is None:
+                if not attendre:
+                    break
+                time.sleep(PAUSE_FILE_VIDE)
+                continue
+            try:
+                resultat = executer_travail(file, travail, dossier, travailleur, duree_bail)
+                file.terminer(travail["id"], travailleur, resultat)
+                termines += 1
+            except BailPerdu:
+                continue  # Repris par un autre travailleur : son résultat fera foi
+            except Exception as erreur:
+                file.echouer(travail["id"], travailleur, f"{type(erreur).__name__}: {erreur}")
+    return termines
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="File de travaux de simulation (SQLite)")
+    parser.add_argument("file", help="Fichier SQLite de la file (sur un disque partagé entre les machines)")
+    commandes = parser.add_subparsers(dest="commande", required=True)
+    soumettre = commandes.add_parser("soumettre", help="Ajouter des scénarios à la file")
+    soumettre.add_argument("scenarios", nargs="*", help="Fichiers JSON de scénarios (par défaut : système solaire)")
+    soumettre.add_argument("--every", type=int, default=1, help="Archiver un instantané tous les N pas")
+    soumettre.add_argument("--tentatives", type=int, default=TENTATIVES_MAX)
+    travailleur = commandes.add_parser("travailleur", help="Exécuter des travaux de la file")
+    travailleur.add_argument("--resultats", default="resultats", help="Dossier des archives produites")
+    travailleur.add_argument("--bail", type=float, default=DUREE_BAIL, help="Durée du bail (s)")
+    travailleur.add_argument("--attendre", action="store_true", help="Attendre de nouveaux travaux quand la file est vide")
+    commandes.add_parser("etat", help="Afficher le nombre de travaux dans chaque état")
+    arguments = parser.parse_args()
+
+    if arguments.commande == "soumettre":
+        scenarios = []
+        for chemin in arguments.scenarios:
+            with open(chemin, encoding='utf-8') as fichier:
+                scenarios.append(json.load(fichier))
+        with FileTravaux(arguments.file) as file:
+            for scenario in scenarios or [SYSTEME_SOLAIRE]:
+                print(file.soumettre(scenario, arguments.tentatives, every=arguments.every))
+    elif arguments.commande == "travailleur":
+        print(travailler(arguments.file, arguments.resultats, duree_bail=arguments.bail, attendre=arguments.attendre), "travaux terminés")
+    else:
+        with FileTravaux(arguments.file) as file:
+            print(file.compter())
@@ -0,0 +1,42 @@
+from collections import namedtuple
+from moteur import SortieDense
+
+# Instantané de l'état : vues sur les tableaux de l'état (ou copies si demandé).
+# dense : sortie dense (moteur.SortieDense) couvrant les pas écoulés depuis l'instantané précédent, si demandée.
+Instantane = namedtuple("Instantane", ["etape", "temps", "ids", "positions", "vitesses", "dense"], defaults=[None])
+
+# Fonction pour créer un instantané de l'état courant
+def instantane(state, etape, copie=False, dense=None):
+    if copie:
+        return Instantane(etape, state.temps, state.ids.copy(), state.positions.copy(), state.vitesses.copy(), dense)
+    return Instantane(etape, state.temps, state.ids, state.positions, state.vitesses, dense)
+
+# Générateur pour simuler pas à pas et produire un instantané tous les `every` pas.
+# Les instantanés sont produits à la demande : rien n'est conservé, et l'appelant peut s'arrêter à tout moment.
+# Sans copie, les tableaux sont des vues qui changent au pas suivant.
+# Si un publicateur (publication.PublicateurEtat) est fourni, l'état y est publié à chaque pas.
+# Avec dense=True, chaque instantané porte la sortie dense des pas écoulés depuis le précédent.
+# dt_initial : premier pas interne du moteur (ex: state.pas_interne pour prolonger une simulation à l'identique)
+def simulate(state, dt, steps, every=1, copie=False, publicateur=None, dense=False, dt_initial=None, **options):
+    pas_interne = dt_initial
+    sortie_dense = SortieDense() if dense else None
+    for etape in range(1, steps + 1):
+        pas_interne = state.avancer_hermite(dt, pas_interne, sortie_dense=sortie_dense, **options)
+        if publicateur is not None:
+            publicateur.publier(state, etape)
+        if etape % every == 0:
+            yield instantane(state, etape, copie, sortie_dense)
+            sortie_dense = SortieDense() if dense else None
+
+# Générateur pour produire `images_par_pas` instantanés régulièrement espacés par pas physique,
+# interpolés par la sortie dense : le pas de calcul reste grand et l'animation reste fluide
+def echantillonner(state, dt, steps, images_par_pas=1, **options):
+    for pas in simulate(state, dt, steps, dense=True, **options):
+        # Instants pris dans l'intervalle couvert par la sortie dense (recalculer depuis pas.temps - dt peut en sortir
+        # de quelques ulps) ; la dernière image est l'état calculé lui-même
+        debut, fin = pas.dense.debut, pas.dense.fin
+        for i in range(1, images_par_pas):
+            temps = min(debut + i * (fin - debut) / images_par_pas, fin)
+            positions, vitesses = pas.dense.evaluer(temps)
+            yield Instantane(pas.etape, temps, pas.ids.copy(), positions, vitesses)
+        yield Instantane(pas.etape, pas.temps, pas.ids.copy(), pas.positions.copy(), pas.vitesses.copy())
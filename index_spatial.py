@@ -0,0 +1,192 @@
+import heapq
+import numpy as np
+
+# Index spatio-temporel sur une archive de trajectoires (archive.LecteurArchive).
+# Pour chaque bloc de temps de l'archive, on garde la boîte englobante de chaque corps pendant le bloc,
+# et un arbre k-d sur ces boîtes. Une requête élimine d'abord les blocs hors de l'intervalle de temps,
+# puis les corps dont la boîte est trop loin, et ne décompresse les positions que pour les blocs restants.
+
+TAILLE_FEUILLE = 16  # Nombre maximal de boîtes dans une feuille de l'arbre
+
+# Fenêtres de proximité : corps, début et fin de la fenêtre (instants archivés), distance minimale atteinte
+TYPE_FENETRE = np.dtype([("id", 'int64'), ("debut", 'float64'), ("fin", 'float64'), ("distance_min", 'float64')])
+
+# Fonction pour calculer la distance entre des boîtes (n, d) et une boîte (d) (0 si elles se recouvrent)
+def distance_boites(minimum, maximum, autre_minimum, autre_maximum):
+    ecart = np.maximum(0.0, np.maximum(minimum - autre_maximum, autre_minimum - maximum))
+    return np.sqrt(np.einsum('...k,...k->...', ecart, ecart))
+
+# Arbre k-d sur des boîtes alignées sur les axes (des points si maximum est omis) : découpage à la médiane
+# des centres selon l'axe le plus étendu, chaque nœud connaît la boîte englobant toutes celles de son sous-arbre
+class ArbreKd:
+    def __init__(self, minimum, maximum=None):
+        self.minimum = np.asarray(minimum, dtype='float64')
+        self.maximum = self.minimum if maximum is None else np.asarray(maximum, dtype='float64')
+        self.ordre = np.arange(len(self.minimum))
+        self._debuts, self._fins, self._enfants, self._boites_min, self._boites_max = [], [], [], [], []
+        if len(self.minimum):
+            self._construire(0, len(self.minimum), (self.minimum + self.maximum) / 2)
+        self._boites_min = np.array(self._boites_min)
+        self._boites_max = np.array(self._boites_max)
+
+    def _construire(self, debut, fin, centres):
+        numero = len(self._debuts)
+        indices = self.ordre[debut:fin]
+        self._debuts.append(debut)
+        self._fins.append(fin)
+        self._enfants.append(None)
+        self._boites_min.append(self.minimum[indices].min(axis=0))
+        self._boites_max.append(self.maximum[indices].max(axis=0))
+        if fin - debut > TAILLE_FEUILLE:
+            axe = np.argmax(np.ptp(centres[indices], axis=0))
+            milieu = (fin - debut) // 2
+            self.ordre[debut:fin] = indices[np.argpartition(centres[indices, axe], milieu)]
+            gauche = self._construire(debut, debut + milieu, centres)
+            droite = self._construire(debut + milieu, fin, centres)
+            self._enfants[numero] = (gauche, droite)
+        return numero
+
+    # Indices des boîtes à une distance au plus `marge` de la boîte [minimum, maximum]
+    def proches_boite(self, minimum, maximum, marge=0.0):
+        trouves = []
+        pile = [0] if self._debuts else []
+        while pile:
+            numero = pile.pop()
+            if distance_boites(self._boites_min[numero], self._boites_max[numero], minimum, maximum) > marge:
+                continue
+            if self._enfants[numero] is not None:
+                pile.extend(self._enfants[numero])
+                continue
+            indices = self.ordre[self._debuts[numero]:self._fins[numero]]
+            gardes = distance_boites(self.minimum[indices], self.maximum[indices], minimum, maximum) <= marge
+            trouves.append(indices[gardes])
+        return np.sort(np.concatenate(trouves)) if trouves else np.empty(0, dtype='int64')
+
+    # Indices et distances des k boîtes les plus proches du point (recherche du meilleur d'abord)
+    def plus_proches(self, point, k=1):
+        point = np.asarray(point, dtype='float64')
+        meilleurs = []  # Tas de (-distance, indice) des k meilleurs candidats
+        file = [(0.0, 0)] if self._debuts else []
+        while file:
+            distance_noeud, numero = heapq.heappop(file)
+            if len(meilleurs) == k and distance_noeud > -meilleurs[0][0]:
+                break
+            if self._enfants[numero] is not None:
+                for enfant in self._enfants[numero]:
+                    heapq.heappush(file, (float(distance_boites(self._boites_min[enfant], self._boites_max[enfant], point, point)), enfant))
+                continue
+            indices = self.ordre[self._debuts[numero]:self._fins[numero]]
+            for indice, distance in zip(indices, distance_boites(self.minimum[indices], self.maximum[indices], point, point)):
+                if len(meilleurs) < k:
+                    heapq.heappush(meilleurs, (-distance, indice))
+                elif distance < -meilleurs[0][0]:
+                    heapq.heapreplace(meilleurs, (-distance, indice))
+        meilleurs.sort(reverse=True)
+        return np.array([indice for _, indice in meilleurs], dtype='int64'), np.array([-distance for distance, _ in meilleurs])
+
+# Classe pour interroger une archive dans l'espace et le temps
+class IndexSpatial:
+    # boites : tableau (blocs, 2, corps, dimension) des boîtes min/max ; calculé depuis l'archive si omis
+    def __init__(self, lecteur, boites=None):
+        self.lecteur = lecteur
+        self.boites = self._calculer_boites() if boites is None else boites
+        self._arbres = {}
+
+    # Parcourt l'archive une seule fois pour calculer la boîte de chaque corps dans chaque bloc
+    def _calculer_boites(self):
+        boites = []
+        for numero in range(len(self.lecteur.blocs)):
+            positions = self.lecteur.lire_tableau(numero, "positions")
+            boites.append(np.stack([positions.min(axis=0), positions.max(axis=0)]))
+        return np.array(boites)
+
+    # Sauvegarder les boîtes pour ne pas relire l'archive la prochaine fois
+    def sauvegarder(self, chemin):
+        np.save(chemin, self.boites)
+
+    @classmethod
+    def charger(cls, chemin, lecteur):
+        return cls(lecteur, np.load(chemin))
+
+    # Arbre k-d des boîtes d'un bloc (construit à la première requête)
+    def arbre(self, numero_bloc):
+        if numero_bloc not in self._arbres:
+            self._arbres[numero_bloc] = ArbreKd(self.boites[numero_bloc, 0], self.boites[numero_bloc, 1])
+        return self._arbres[numero_bloc]
+
+    def _indice(self, corps):
+        return self.lecteur.noms.index(corps) if isinstance(corps, str) else corps
+
+    # Identifiants des corps passés dans la région [minimum, maximum] entre t_debut et t_fin
+    def region(self, minimum, maximum, t_debut, t_fin):
+        minimum, maximum = np.asarray(minimum, dtype='float64'), np.asarray(maximum, dtype='float64')
+        trouves = set()
+        for numero in self.lecteur.blocs_entre(t_debut, t_fin):
+            candidats = self.arbre(numero).proches_boite(minimum, maximum)
+            candidats = candidats[~np.isin(self.lecteur.ids[candidats], list(trouves))]
+            if len(candidats) == 0:
+                continue
+            temps = self.lecteur.lire_tableau(numero, "temps")
+            positions = self.lecteur.lire_tableau(numero, "positions")[(temps >= t_debut) & (temps <= t_fin)][:, candidats]
+            dedans = np.all((positions >= minimum) & (positions <= maximum), axis=-1).any(axis=0)
+            trouves.update(self.lecteur.ids[candidats[dedans]].tolist())
+        return np.array(sorted(trouves), dtype='int64')
+
+    # Fenêtres de temps pendant lesquelles chaque corps est resté à moins de `rayon` km de `corps`
+    # (nom ou ligne dans l'archive), entre t_debut et t_fin, au pas des instants archivés
+    def fenetres_proximite(self, corps, rayon, t_debut, t_fin):
+        reference = self._indice(corps)
+        ids = self.lecteur.ids
+        fenetres = []
+        ouvertes = {}  # Ligne du corps -> [début, fin, distance minimale], fenêtre qui touche la fin du bloc précédent
+
+        for numero in self.lecteur.blocs_entre(t_debut, t_fin):
+            boites = self.boites[numero]
+            candidats = self.arbre(numero).proches_boite(boites[0, reference], boites[1, reference], rayon)
+            candidats = candidats[candidats != reference]
+            temps = self.lecteur.lire_tableau(numero, "temps") if len(candidats) else np.empty(0)
+            garde = (temps >= t_debut) & (temps <= t_fin)
+            temps = temps[garde]
+            poursuivies = {}
+            if len(temps):
+                positions = self.lecteur.lire_tableau(numero, "positions")[garde]
+                distances = np.linalg.norm(positions[:, candidats] - positions[:, [reference]], axis=-1)
+                for colonne, ligne in enumerate(candidats):
+                    proche = distances[:, colonne] <= rayon
+                    if not proche.any():
+                        continue
+                    # Début et fin (exclue) de chaque suite d'instants consécutifs à moins de `rayon`
+                    bords = np.flatnonzero(np.diff(np.concatenate([[False], proche, [False]]).astype('int8')))
+                    for debut, fin in zip(bords[::2], bords[1::2]):
+                        distance_min = distances[debut:fin, colonne].min()
+                        if debut == 0 and ligne in ouvertes:
+                            fenetre = ouvertes.pop(ligne)
+                            fenetre[1], fenetre[2] = temps[fin - 1], min(fenetre[2], distance_min)
+                        else:
+                            fenetre = [temps[debut], temps[fin - 1], distance_min]
+                        if fin == len(temps):
+                            poursuivies[ligne] = fenetre
+                        else:
+                            fenetres.append((ids[ligne], *fenetre))
+            fenetres.extend((ids[ligne], *fenetre) for ligne, fenetre in ouvertes.items())
+            ouvertes = poursuivies
+
+        fenetres.extend((ids[ligne], *fenetre) for ligne, fenetre in ouvertes.items())
+        table = np.array(fenetres, dtype=TYPE_FENETRE)
+        return table[np.lexsort((table["debut"], table["id"]))]
+
+    # Identifiants des corps passés à moins de `rayon` km de `corps` entre t_debut et t_fin
+    def proches(self, corps, rayon, t_debut, t_fin):
+        return np.unique(self.fenetres_proximite(corps, rayon, t_debut, t_fin)["id"])
+
+    # Les k corps les plus proches d'un point (coordonnées, ou nom/ligne d'un corps) au dernier instant archivé
+    # avant t : renvoie leurs identifiants et leurs distances
+    def plus_proches(self, point, t, k=1):
+        _, positions, _ = self.lecteur.instantane(t)
+        exclu = None
+        if isinstance(point, (str, int, np.integer)):
+            exclu = self._indice(point)
+            point = positions[exclu]
+        lignes, distances = ArbreKd(positions).plus_proches(point, k + (exclu is not None))
+        garde = lignes != exclu
+        return self.lecteur.ids[lignes[garde][:k]], distances[garde][:k]
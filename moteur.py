@@ -0,0 +1,247 @@
+import os
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# Noyaux compilés optionnels (Numba)
+try:
+    import noyaux_numba
+except ImportError:
+    noyaux_numba = None
+
+# Version des résultats numériques du moteur : à incrémenter à chaque changement qui modifie les trajectoires
+# calculées (elle fait partie de la clé du cache de résultats, voir cache.py)
+VERSION_MOTEUR = 1
+
+# Constante gravitationnelle (en km^3 kg^(-1) s^(-2))
+G = 6.67430e-20  # Constante gravitationnelle en km^3/kg/s^2
+
+# Paramètres du critère de pas de temps d'Aarseth
+ETA_AARSETH = 0.02  # Précision du critère d'Aarseth (pas courants)
+ETA_INITIAL = 0.01  # Précision du premier pas (|a| / |j|)
+
+# Paramètres du noyau de force par blocs (modifiables, ex: moteur.NOMBRE_THREADS = 32)
+TAILLE_BLOC = 128  # Nombre de corps cibles par bloc
+NOMBRE_THREADS = os.cpu_count() or 1  # Nombre de threads du pool
+_executeur = None
+
+# Moteur de calcul : "numba" (noyaux compilés, choisi si disponible), "numpy",
+# ou un objet fournissant calculer_acceleration_et_jerk (ex: parallele.MoteurMultiprocessus)
+MOTEUR_CALCUL = "numba" if noyaux_numba is not None else "numpy"
+
+# Fonction pour calculer l'accélération et le jerk de corps cibles dus à des corps sources de paramètres G·m
+# (decalage : indice de la première cible parmi les sources, pour exclure l'interaction d'un corps avec lui-même)
+def _acceleration_et_jerk_cibles(positions_cibles, vitesses_cibles, positions, vitesses, gm, adoucissement=0.0, decalage=None):
+    # delta[i, j] = x_j - x_i : vecteur de la cible i vers la source j
+    delta_pos = positions[np.newaxis, :, :] - positions_cibles[:, np.newaxis, :]
+    delta_vit = vitesses[np.newaxis, :, :] - vitesses_cibles[:, np.newaxis, :]
+
+    distance2 = np.einsum('ijk,ijk->ij', delta_pos, delta_pos) + adoucissement**2
+    inverse_distance = np.zeros_like(distance2)
+    np.divide(1.0, np.sqrt(distance2), out=inverse_distance, where=distance2 > 0)  # Corps confondus ignorés
+    if decalage is not None:
+        lignes = np.arange(len(positions_cibles))
+        inverse_distance[lignes, lignes + decalage] = 0.0
+
+    inverse_distance3 = inverse_distance**3
+    rv = np.einsum('ijk,ijk->ij', delta_pos, delta_vit) * inverse_distance**2
+
+    coefficient = gm[np.newaxis, :] * inverse_distance3
+    acceleration = np.einsum('ij,ijk->ik', coefficient, delta_pos)
+    delta_vit -= 3 * rv[:, :, np.newaxis] * delta_pos
+    jerk = np.einsum('ij,ijk->ik', coefficient, delta_vit)
+    return acceleration, jerk
+
+# Fonction pour calculer l'accélération et le jerk des corps cibles [debut, fin[ dus à tous les corps
+def _acceleration_et_jerk_bloc(positions, vitesses, gm, debut, fin, adoucissement=0.0):
+    return _acceleration_et_jerk_cibles(positions[debut:fin], vitesses[debut:fin], positions, vitesses, gm, adoucissement, debut)
+
+# Fonction pour récupérer (ou recréer) le pool de threads du noyau par blocs
+def _executeur_threads(nombre_threads):
+    global _executeur
+    if _executeur is None or _executeur._max_workers != nombre_threads:
+        if _executeur is not None:
+            _executeur.shutdown(wait=False)
+        _executeur = ThreadPoolExecutor(max_workers=nombre_threads)
+    return _executeur
+
+# Fonction pour calculer l'accélération et le jerk de tous les corps en une passe,
+# par blocs de corps cibles répartis sur un pool de threads (NumPy libère le GIL).
+# gm (G·m précalculé) et sources (indices des corps massifs) peuvent être fournis par l'appelant
+# pour éviter de les recalculer à chaque évaluation (voir SystemState.gm et SystemState.sources)
+def calculer_acceleration_et_jerk(positions, vitesses, masses, adoucissement=0.0, taille_bloc=None, nombre_threads=None, moteur_calcul=None, gm=None, sources=None):
+    taille_bloc = taille_bloc or TAILLE_BLOC
+    nombre_threads = nombre_threads or NOMBRE_THREADS
+    gm = G * masses if gm is None else gm
+
+    moteur_calcul = moteur_calcul or MOTEUR_CALCUL
+    if not isinstance(moteur_calcul, str):
+        return moteur_calcul.calculer_acceleration_et_jerk(positions, vitesses, masses, adoucissement, gm=gm)
+    if moteur_calcul == "numba":
+        noyaux_numba.configurer_threads(nombre_threads)
+        return noyaux_numba.acceleration_et_jerk(positions, vitesses, gm, float(adoucissement**2))
+
+    # Seuls les corps massifs exercent une force : les corps sans masse ne sont que des cibles
+    if sources is not None and len(sources) < len(positions):
+        return calculer_acceleration_et_jerk_externe(
+            positions, vitesses, positions[sources], vitesses[sources], None, adoucissement,
+            taille_bloc, nombre_threads, gm=gm[sources],
+        )
+
+    return _calculer_par_blocs(
+        lambda debut, fin: _acceleration_et_jerk_bloc(positions, vitesses, gm, debut, fin, adoucissement),
+        positions.shape, taille_bloc, nombre_threads,
+    )
+
+# Fonction pour calculer l'accélération et le jerk de corps cibles dus à un ensemble distinct de corps sources
+# (ex: particules test sans masse dans le champ des corps massifs), par blocs de cibles
+def calculer_acceleration_et_jerk_externe(positions_cibles, vitesses_cibles, positions, vitesses, masses, adoucissement=0.0, taille_bloc=None, nombre_threads=None, gm=None):
+    gm = G * masses if gm is None else gm
+    return _calculer_par_blocs(
+        lambda debut, fin: _acceleration_et_jerk_cibles(positions_cibles[debut:fin], vitesses_cibles[debut:fin], positions, vitesses, gm, adoucissement),
+        positions_cibles.shape, taille_bloc or TAILLE_BLOC, nombre_threads or NOMBRE_THREADS,
+    )
+
+# Fonction pour répartir un calcul par blocs de cibles sur le pool de threads
+# (mémoire crête bornée à (nombre de threads) x taille_bloc x N)
+def _calculer_par_blocs(calculer, forme, taille_bloc, nombre_threads):
+    nombre_cibles = forme[0]
+    if nombre_cibles <= taille_bloc:
+        return calculer(0, nombre_cibles)
+
+    acceleration = np.empty(forme)
+    jerk = np.empty(forme)
+
+    def calculer_bloc(debut):
+        fin = min(debut + taille_bloc, nombre_cibles)
+        acceleration[debut:fin], jerk[debut:fin] = calculer(debut, fin)
+
+    debuts = range(0, nombre_cibles, taille_bloc)
+    if nombre_threads == 1:
+        for debut in debuts:
+            calculer_bloc(debut)
+    else:
+        list(_executeur_threads(nombre_threads).map(calculer_bloc, debuts))
+    return acceleration, jerk
+
+# Fonction pour estimer le premier pas de temps à partir de |a| / |j|
+def pas_de_temps_initial(acceleration, jerk, eta=ETA_INITIAL):
+    norme_a = np.linalg.norm(acceleration, axis=1)
+    norme_j = np.linalg.norm(jerk, axis=1)
+    actifs = norme_j > 0
+    if not np.any(actifs):
+        return np.inf
+    return eta * np.min(norme_a[actifs] / norme_j[actifs])
+
+# Fonction pour calculer le pas de temps partagé selon le critère d'Aarseth
+def pas_de_temps_aarseth(acceleration, jerk, snap, crackle, eta=ETA_AARSETH):
+    norme_a = np.linalg.norm(acceleration, axis=1)
+    norme_j = np.linalg.norm(jerk, axis=1)
+    norme_s = np.linalg.norm(snap, axis=1)
+    norme_c = np.linalg.norm(crackle, axis=1)
+
+    numerateur = norme_a * norme_s + norme_j**2
+    denominateur = norme_j * norme_c + norme_s**2
+    actifs = denominateur > 0
+    if not np.any(actifs):
+        return np.inf
+    return np.min(np.sqrt(eta * numerateur[actifs] / denominateur[actifs]))
+
+# Fonction pour la prédiction de Hermite (développement de Taylor)
+def predire_hermite(positions, vitesses, acceleration, jerk, dt):
+    positions_predites = positions + vitesses * dt + acceleration * (dt**2 / 2) + jerk * (dt**3 / 6)
+    vitesses_predites = vitesses + acceleration * dt + jerk * (dt**2 / 2)
+    return positions_predites, vitesses_predites
+
+# Fonction pour la correction de Hermite, renvoie les nouvelles positions et vitesses
+def corriger_hermite(positions, vitesses, acceleration, jerk, acceleration1, jerk1, dt):
+    vitesses_corrigees = vitesses + (acceleration + acceleration1) * (dt / 2) + (jerk - jerk1) * (dt**2 / 12)
+    positions_corrigees = positions + (vitesses + vitesses_corrigees) * (dt / 2) + (acceleration - acceleration1) * (dt**2 / 12)
+    return positions_corrigees, vitesses_corrigees
+
+# Fonction pour le pas suivant selon Aarseth, à partir des dérivées d'ordre supérieur
+# (interpolation d'Hermite du pas écoulé, ramenées en fin de pas)
+def pas_de_temps_suivant(acceleration, jerk, acceleration1, jerk1, dt, eta=ETA_AARSETH):
+    crackle = (12 * (acceleration - acceleration1) + 6 * dt * (jerk + jerk1)) / dt**3
+    snap = (-6 * (acceleration - acceleration1) - dt * (4 * jerk + 2 * jerk1)) / dt**2 + dt * crackle
+    return pas_de_temps_aarseth(acceleration1, jerk1, snap, crackle, eta)
+
+# Fonction pour effectuer un pas de Hermite d'ordre 4 (prédicteur-correcteur), en place
+def pas_hermite(positions, vitesses, masses, dt, acceleration=None, jerk=None, eta=ETA_AARSETH, adoucissement=0.0, moteur_calcul=None, gm=None, sources=None, taille_bloc=None, nombre_threads=None):
+    moteur_calcul = moteur_calcul or MOTEUR_CALCUL
+    gm = G * masses if gm is None else gm
+    if acceleration is None or jerk is None:
+        acceleration, jerk = calculer_acceleration_et_jerk(positions, vitesses, masses, adoucissement, taille_bloc, nombre_threads, moteur_calcul=moteur_calcul, gm=gm, sources=sources)
+
+    if moteur_calcul == "numba":
+        positions_predites, vitesses_predites = noyaux_numba.predire_hermite(positions, vitesses, acceleration, jerk, dt)
+    else:
+        positions_predites, vitesses_predites = predire_hermite(positions, vitesses, acceleration, jerk, dt)
+
+    acceleration1, jerk1 = calculer_acceleration_et_jerk(positions_predites, vitesses_predites, masses, adoucissement, taille_bloc, nombre_threads, moteur_calcul=moteur_calcul, gm=gm, sources=sources)
+
+    if moteur_calcul == "numba":
+        noyaux_numba.corriger_hermite(positions, vitesses, acceleration, jerk, acceleration1, jerk1, dt)
+    else:
+        positions[:], vitesses[:] = corriger_hermite(positions, vitesses, acceleration, jerk, acceleration1, jerk1, dt)
+
+    dt_suivant = pas_de_temps_suivant(acceleration, jerk, acceleration1, jerk1, dt, eta)
+    return acceleration1, jerk1, dt_suivant
+
+# Classe pour la sortie dense : interpolation d'Hermite cubique entre les sous-pas déjà calculés,
+# à partir des positions, vitesses et accélérations de leurs extrémités (aucune évaluation de force en plus)
+class SortieDense:
+    def __init__(self):
+        self.debuts = []
+        self.segments = []  # (debut, fin, positions, vitesses, accelerations au début, puis à la fin)
+
+    @property
+    def debut(self):
+        return self.segments[0][0]
+
+    @property
+    def fin(self):
+        return self.segments[-1][1]
+
+    def ajouter(self, debut, fin, positions0, vitesses0, acceleration0, positions1, vitesses1, acceleration1):
+        self.debuts.append(debut)
+        self.segments.append((debut, fin, positions0, vitesses0, acceleration0, positions1, vitesses1, acceleration1))
+
+    # Positions et vitesses interpolées à l'instant t (dans [debut, fin])
+    def evaluer(self, t):
+        if not self.segments or not self.debut <= t <= self.fin:
+            raise ValueError(f"L'instant {t} est hors de l'intervalle couvert par la sortie dense.")
+        debut, fin, x0, v0, a0, x1, v1, a1 = self.segments[max(0, bisect_right(self.debuts, t) - 1)]
+        h = fin - debut
+        s = (t - debut) / h
+
+        # Polynômes de base d'Hermite cubique
+        h00 = 2 * s**3 - 3 * s**2 + 1
+        h10 = s**3 - 2 * s**2 + s
+        h01 = -2 * s**3 + 3 * s**2
+        h11 = s**3 - s**2
+        positions = h00 * x0 + h10 * h * v0 + h01 * x1 + h11 * h * v1
+        vitesses = h00 * v0 + h10 * h * a0 + h01 * v1 + h11 * h * a1
+        return positions, vitesses
+
+# Fonction pour avancer le système d'une durée donnée par sous-pas de Hermite adaptatifs.
+# Si sortie_dense est fournie, chaque sous-pas y est enregistré (instants comptés à partir de temps_initial).
+def avancer_hermite(positions, vitesses, masses, duree, dt_initial=None, eta=ETA_AARSETH, adoucissement=0.0, moteur_calcul=None, gm=None, sources=None, sortie_dense=None, temps_initial=0.0, taille_bloc=None, nombre_threads=None):
+    gm = G * masses if gm is None else gm  # Calculé une fois pour tous les sous-pas
+    acceleration, jerk = calculer_acceleration_et_jerk(positions, vitesses, masses, adoucissement, taille_bloc, nombre_threads, moteur_calcul=moteur_calcul, gm=gm, sources=sources)
+    dt = dt_initial if dt_initial else pas_de_temps_initial(acceleration, jerk)
+
+    temps = 0.0
+    while temps < duree:
+        pas = min(dt, duree - temps)
+        if duree - temps - pas < 0.1 * pas:
+            pas = duree - temps  # Éviter un dernier sous-pas minuscule
+        if sortie_dense is not None:
+            debut_segment = (positions.copy(), vitesses.copy(), acceleration)
+        acceleration, jerk, dt_aarseth = pas_hermite(positions, vitesses, masses, pas, acceleration, jerk, eta, adoucissement, moteur_calcul, gm, sources, taille_bloc, nombre_threads)
+        if sortie_dense is not None:
+            sortie_dense.ajouter(temps_initial + temps, temps_initial + temps + pas, *debut_segment, positions.copy(), vitesses.copy(), acceleration)
+        temps += pas
+        dt = min(dt_aarseth, 2 * dt)  # Limiter la croissance du pas
+
+    return dt
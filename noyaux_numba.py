@@ -0,0 +1,67 @@
+import numpy as np
+from numba import njit, prange, set_num_threads, config
+
+# OpenMP en priorité : avec TBB, le processus ne se termine pas quand les noyaux
+# ont été lancés depuis un thread secondaire (ex: exécuteur du service asynchrone)
+config.THREADING_LAYER_PRIORITY = ["omp", "tbb", "workqueue"]
+
+# Noyaux compilés (Numba) équivalents à ceux de moteur.py, parallélisés sur les corps cibles.
+# Les masses sont passées sous forme G·m pour ne pas dépendre de moteur.py.
+
+# Fonction pour limiter le nombre de threads Numba au réglage du moteur
+def configurer_threads(nombre_threads):
+    set_num_threads(max(1, min(nombre_threads, config.NUMBA_NUM_THREADS)))
+
+# Fonction pour calculer l'accélération et le jerk de tous les corps (somme directe)
+@njit(parallel=True, cache=True)
+def acceleration_et_jerk(positions, vitesses, gm, adoucissement2):
+    nombre_corps, dimension = positions.shape
+    acceleration = np.zeros((nombre_corps, dimension))
+    jerk = np.zeros((nombre_corps, dimension))
+
+    for i in prange(nombre_corps):
+        for j in range(nombre_corps):
+            if i == j:
+                continue
+            distance2 = adoucissement2
+            rv = 0.0
+            for k in range(dimension):
+                dx = positions[j, k] - positions[i, k]
+                dv = vitesses[j, k] - vitesses[i, k]
+                distance2 += dx * dx
+                rv += dx * dv
+            if distance2 == 0.0:
+                continue  # Corps confondus ignorés
+
+            inverse_distance2 = 1.0 / distance2
+            coefficient = gm[j] * inverse_distance2 * np.sqrt(inverse_distance2)
+            rv *= 3.0 * inverse_distance2
+            for k in range(dimension):
+                dx = positions[j, k] - positions[i, k]
+                dv = vitesses[j, k] - vitesses[i, k]
+                acceleration[i, k] += coefficient * dx
+                jerk[i, k] += coefficient * (dv - rv * dx)
+
+    return acceleration, jerk
+
+# Fonction pour la prédiction de Hermite (développement de Taylor)
+@njit(parallel=True, cache=True)
+def predire_hermite(positions, vitesses, acceleration, jerk, dt):
+    nombre_corps, dimension = positions.shape
+    positions_predites = np.empty_like(positions)
+    vitesses_predites = np.empty_like(vitesses)
+    for i in prange(nombre_corps):
+        for k in range(dimension):
+            positions_predites[i, k] = positions[i, k] + dt * (vitesses[i, k] + dt * (acceleration[i, k] / 2 + dt * jerk[i, k] / 6))
+            vitesses_predites[i, k] = vitesses[i, k] + dt * (acceleration[i, k] + dt * jerk[i, k] / 2)
+    return positions_predites, vitesses_predites
+
+# Fonction pour la correction de Hermite, en place
+@njit(parallel=True, cache=True)
+def corriger_hermite(positions, vitesses, acceleration, jerk, acceleration1, jerk1, dt):
+    nombre_corps, dimension = positions.shape
+    for i in prange(nombre_corps):
+        for k in range(dimension):
+            vitesse = vitesses[i, k] + (acceleration[i, k] + acceleration1[i, k]) * (dt / 2) + (jerk[i, k] - jerk1[i, k]) * (dt * dt / 12)
+            positions[i, k] += (vitesses[i, k] + vitesse) * (dt / 2) + (acceleration[i, k] - acceleration1[i, k]) * (dt * dt / 12)
+            vitesses[i, k] = vitesse
@@ -0,0 +1,169 @@
+import multiprocessing as mp
+from multiprocessing.connection import wait as attendre
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+import moteur
+from moteur import G, _acceleration_et_jerk_bloc
+
+# Commandes envoyées aux processus de calcul (et réponse d'un calcul terminé) par leur tube
+CALCULER = 0
+ARRETER = 1
+TERMINE = 2
+
+# Délai maximal (s) d'attente d'un calcul de forces : au-delà, le calcul est considéré comme bloqué
+DELAI_CALCUL = 300.0
+
+# Tableaux partagés : nom -> True si vectoriel (une ligne par corps), False si scalaire par corps
+TABLEAUX_PARTAGES = {
+    "positions": True,
+    "vitesses": True,
+    "gm": False,  # G·m des corps
+    "acceleration": True,
+    "jerk": True,
+}
+
+# Fonction pour attacher un tableau NumPy à un bloc de mémoire partagée
+def _vue_partagee(bloc, forme):
+    return np.ndarray(forme, dtype='float64', buffer=bloc.buf)
+
+# Fonction exécutée par chaque processus : calcule l'accélération et le jerk de sa tranche de corps à chaque pas,
+# par sous-blocs de taille_bloc cibles (mémoire crête bornée à taille_bloc x N par processus).
+# Une erreur de calcul est renvoyée au processus principal par le tube au lieu de la réponse TERMINE.
+def _travailleur(noms_blocs, formes, debut, fin, adoucissement, taille_bloc, tube):
+    blocs = {nom: SharedMemory(name=nom_bloc) for nom, nom_bloc in noms_blocs.items()}
+    tableaux = {nom: _vue_partagee(blocs[nom], formes[nom]) for nom in blocs}
+
+    try:
+        while tube.recv() == CALCULER:
+            try:
+                for debut_bloc in range(debut, fin, taille_bloc):
+                    fin_bloc = min(debut_bloc + taille_bloc, fin)
+                    tableaux["acceleration"][debut_bloc:fin_bloc], tableaux["jerk"][debut_bloc:fin_bloc] = _acceleration_et_jerk_bloc(
+                        tableaux["positions"], tableaux["vitesses"], tableaux["gm"], debut_bloc, fin_bloc, adoucissement,
+                    )
+            except Exception as erreur:
+                tube.send(erreur)
+                break
+            tube.send(TERMINE)
+    except (EOFError, OSError):
+        pass  # Le processus principal a fermé le tube
+    finally:
+        del tableaux
+        for bloc in blocs.values():
+            bloc.close()
+
+# Classe pour répartir le calcul des forces sur plusieurs processus partageant l'état en mémoire.
+# Le nombre de corps est fixé à la création : après un ajout ou un retrait de corps (SystemState), il faut créer un nouveau moteur.
+class MoteurMultiprocessus:
+    def __init__(self, nombre_corps, dimension=2, nombre_processus=None, adoucissement=0.0, taille_bloc=None, delai=DELAI_CALCUL):
+        self.nombre_corps = nombre_corps
+        self.adoucissement = adoucissement
+        self.delai = delai
+        nombre_processus = min(nombre_processus or mp.cpu_count(), nombre_corps)
+
+        # Blocs de mémoire partagée : l'état n'est jamais sérialisé, seuls les noms sont transmis
+        formes = {nom: (nombre_corps, dimension) if vectoriel else (nombre_corps,) for nom, vectoriel in TABLEAUX_PARTAGES.items()}
+        self._blocs = {nom: SharedMemory(create=True, size=max(8, int(np.prod(forme)) * 8)) for nom, forme in formes.items()}
+        for nom, forme in formes.items():
+            setattr(self, nom, _vue_partagee(self._blocs[nom], forme))
+
+        # Découpage des corps cibles en tranches contiguës
+        bornes = np.linspace(0, nombre_corps, nombre_processus + 1).astype(int)
+        noms_blocs = {nom: bloc.name for nom, bloc in self._blocs.items()}
+        self._processus = []
+        self._tubes = []
+        for debut, fin in zip(bornes[:-1], bornes[1:]):
+            tube, tube_travailleur = mp.Pipe()
+            processus = mp.Process(
+                target=_travailleur,
+                args=(noms_blocs, formes, int(debut), int(fin), adoucissement, taille_bloc or moteur.TAILLE_BLOC, tube_travailleur),
+                daemon=True,
+            )
+            processus.start()
+            tube_travailleur.close()
+            self._processus.append(processus)
+            self._tubes.append(tube)
+
+    # Identifiants des processus de calcul (ex: pour mesurer leur mémoire)
+    @property
+    def pids(self):
+        return [processus.pid for processus in self._processus]
+
+    # Calcul de l'accélération et du jerk (même interface que moteur.calculer_acceleration_et_jerk)
+    def calculer_acceleration_et_jerk(self, positions=None, vitesses=None, masses=None, adoucissement=None, gm=None):
+        if not self._processus:
+            raise RuntimeError("Le moteur multiprocessus est fermé.")
+        if adoucissement is not None and adoucissement != self.adoucissement:
+            raise ValueError("L'adoucissement est fixé à la création du moteur multiprocessus.")
+        for valeurs in (positions, vitesses, masses, gm):
+            if valeurs is not None and len(valeurs) != self.nombre_corps:
+                raise ValueError(f"Le moteur multiprocessus a été créé pour {self.nombre_corps} corps, pas {len(valeurs)} : créez un nouveau moteur après un ajout ou un retrait de corps.")
+        if gm is None and masses is not None:
+            gm = G * masses
+        for nom, valeurs in (("positions", positions), ("vitesses", vitesses), ("gm", gm)):
+            tableau = getattr(self, nom)
+            if valeurs is not None and valeurs is not tableau:
+                tableau[:] = valeurs
+
+        try:
+            self._attendre_calcul()
+        except RuntimeError:
+            # Les processus restants peuvent être bloqués : ils sont arrêtés sans attendre
+            for processus in self._processus:
+                processus.kill()
+            self.fermer()
+            raise
+        return self.acceleration.copy(), self.jerk.copy()
+
+    # Lance le calcul dans tous les processus et attend leurs réponses. Un processus arrêté ferme son tube :
+    # son arrêt est détecté à la lecture de la réponse.
+    def _attendre_calcul(self):
+        try:
+            for tube in self._tubes:
+                tube.send(CALCULER)
+        except OSError:
+            raise RuntimeError("Un processus de calcul ne répond plus.") from None
+
+        en_attente = dict(zip(self._tubes, self._processus))
+        while en_attente:
+            prets = attendre(list(en_attente), self.delai)
+            if not prets:
+                raise RuntimeError(f"Calcul des forces non terminé après {self.delai} s.")
+            for tube in prets:
+                processus = en_attente.pop(tube)
+                try:
+                    reponse = tube.recv()
+                except (EOFError, OSError):
+                    processus.join(self.delai)
+                    raise RuntimeError(f"Processus de calcul {processus.pid} arrêté (code {processus.exitcode}) pendant le calcul des forces.") from None
+                if reponse != TERMINE:
+                    raise RuntimeError(f"Erreur dans le processus de calcul {processus.pid} : {reponse!r}") from reponse
+
+    def fermer(self):
+        for tube in self._tubes:
+            try:
+                tube.send(ARRETER)
+            except OSError:
+                pass  # Processus déjà arrêté
+        for processus in self._processus:
+            processus.join(self.delai)
+            if processus.is_alive():
+                processus.kill()  # Fonctionne aussi sur un processus suspendu
+                processus.join()
+        for tube in self._tubes:
+            tube.close()
+        self._processus = []
+        self._tubes = []
+
+        for nom in TABLEAUX_PARTAGES:
+            setattr(self, nom, None)
+        for bloc in self._blocs.values():
+            bloc.close()
+            bloc.unlink()
+        self._blocs = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
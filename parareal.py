@@ -0,0 +1,183 @@
+import multiprocessing as mp
+import warnings
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from moteur import G, ETA_AARSETH, avancer_hermite
+from elements import elements_relatifs, elements_vers_etat
+
+# Intégration parallèle en temps (Parareal) : l'intervalle est découpé en tranches, une par processus.
+# Un propagateur grossier et bon marché (orbites de Kepler) donne une première estimation de l'état
+# au début de chaque tranche ; à chaque itération, l'intégrateur fin (Hermite) avance toutes les tranches en
+# parallèle depuis ces estimations, puis une correction séquentielle (grossier) les met à jour :
+#   U[n+1] = G(U[n] nouveau) + F(U[n] ancien) - G(U[n] ancien)
+# Après k itérations, les k premières tranches sont exactes. Chaque itération coûte (en temps réel) une tranche fine :
+# avec P tranches et K itérations, le gain attendu est P / K. Au-delà de K = P, Parareal ne gagne plus rien ;
+# on s'arrête donc dès que l'écart entre deux itérations passe sous la précision de l'intégrateur fin (continuer
+# ne rapproche pas de la solution exacte : les tranches ont de toute façon leur propre suite de pas).
+# Utile pour les longues simulations à peu de corps, où le calcul des forces ne se parallélise pas.
+#
+# La correction est faite en éléments d'orbite non singuliers (a, e·cos ω, e·sin ω, longitude moyenne λ) autour du
+# corps le plus massif : en cartésien, la moindre erreur de période du propagateur grossier devient une erreur de
+# phase qui croît sans cesse et empêche la convergence, alors qu'en éléments l'écart F - G reste petit et régulier.
+# Le corps de référence garde ses coordonnées cartésiennes (x, y, vx, vy). Simulations planes uniquement.
+
+# Écart relatif maximal entre deux itérations sur les états aux bornes des tranches (corps par corps, rapporté à sa distance
+# et à sa vitesse relatives au corps de référence), pour eta = ETA_AARSETH. L'erreur d'Hermite varie comme eta²
+# (pas en racine de eta, ordre 4) : la tolérance par défaut suit la même loi. Système solaire sur 120 ans, 8 tranches :
+# écarts de 5e-3, 1e-4, 2e-6 puis 7e-8 aux itérations 2 à 5 ; il faut donc 5 itérations, au-delà de la limite par défaut
+# (4), qui est signalée par un avertissement.
+TOLERANCE_PARAREAL = 1e-6
+FRACTION_ITERATIONS_MAX = 0.5  # Nombre maximal d'itérations par défaut, en fraction du nombre de tranches (gain >= 2)
+
+# Résultat : positions et vitesses finales, états au début de chaque tranche (tranches + 1, corps, dimension),
+# nombre d'itérations, écart relatif de la dernière itération, vrai si cet écart est sous la tolérance (sinon les états
+# ne sont pas convergés : la limite d'itérations a été atteinte avant) et gain attendu en temps réel (tranches / itérations,
+# avec un processus par tranche, hors coût du propagateur grossier et des échanges entre processus)
+ResultatParareal = namedtuple("ResultatParareal", ["positions", "vitesses", "positions_bornes", "vitesses_bornes", "iterations", "ecart", "converge", "acceleration"])
+
+# Classe pour passer des vecteurs d'état aux coordonnées de la correction (une ligne de 4 valeurs par corps)
+class Coordonnees:
+    def __init__(self, masses, sens):
+        self.gm = G * masses
+        self.reference = int(np.argmax(masses))
+        self.mu = self.gm[self.reference] + self.gm
+        self.sens = sens  # Sens de parcours de chaque orbite, fixé par l'état initial
+
+    @classmethod
+    def depuis_etat(cls, positions, vitesses, masses):
+        elements = elements_relatifs(positions, vitesses, G * masses, int(np.argmax(masses)))
+        return cls(masses, elements.sens)
+
+    def depuis_cartesien(self, positions, vitesses):
+        elements = elements_relatifs(positions, vitesses, self.gm, self.reference)
+        e, omega = elements.e, elements.omega
+        coordonnees = np.stack([elements.a, e * np.cos(omega), e * np.sin(omega), omega + self.sens * elements.M], axis=1)
+        coordonnees[self.reference] = np.concatenate([positions[self.reference], vitesses[self.reference]])
+        return coordonnees
+
+    def vers_cartesien(self, coordonnees):
+        a, k, h, longitude = coordonnees.T.copy()
+        a[self.reference], k[self.reference], h[self.reference], longitude[self.reference] = 1.0, 0.0, 0.0, 0.0
+        omega = np.arctan2(h, k)
+        relatives, vitesses_relatives = elements_vers_etat(a, np.hypot(k, h), omega, self.sens * (longitude - omega), self.mu, self.sens)
+        position_reference, vitesse_reference = coordonnees[self.reference, :2], coordonnees[self.reference, 2:]
+        positions, vitesses = position_reference + relatives, vitesse_reference + vitesses_relatives
+        positions[self.reference], vitesses[self.reference] = position_reference, vitesse_reference
+        return positions, vitesses
+
+    # Différence c1 - c2, avec les longitudes des orbites elliptiques ramenées dans [-pi, pi[
+    def difference(self, c1, c2):
+        difference = c1 - c2
+        elliptiques = c1[:, 0] > 0
+        elliptiques[self.reference] = False
+        difference[elliptiques, 3] = np.mod(difference[elliptiques, 3] + np.pi, 2 * np.pi) - np.pi
+        return difference
+
+    # Propagation de Kepler : seule la longitude moyenne avance ; la référence avance en ligne droite
+    def kepler(self, coordonnees, duree):
+        nouvelles = coordonnees.copy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            nouvelles[:, 3] += self.sens * np.sqrt(self.mu / np.abs(coordonnees[:, 0]) ** 3) * duree
+        nouvelles[self.reference] = coordonnees[self.reference]
+        nouvelles[self.reference, :2] += coordonnees[self.reference, 2:] * duree
+        return nouvelles
+
+# Fonction pour mesurer l'écart relatif entre deux itérations, corps par corps : le changement de position (de vitesse)
+# de chaque corps est rapporté à sa distance (sa vitesse) relative au corps de référence, et celui du corps de référence
+# à la plus grande distance (vitesse) relative du système. Une normalisation globale (orbite de Neptune) laisserait
+# passer des écarts bien plus grands, en relatif, sur les orbites intérieures.
+def ecart_iterations(bornes_x, bornes_v, anciens_x, anciens_v, reference):
+    ecart = 0.0
+    for bornes, anciens in ((bornes_x, anciens_x), (bornes_v, anciens_v)):
+        echelles = np.linalg.norm(bornes - bornes[:, reference:reference + 1], axis=2)
+        echelles[:, reference] = echelles.max(axis=1)
+        changements = np.linalg.norm(bornes - anciens, axis=2)
+        ecarts = np.divide(changements, echelles, out=np.zeros_like(changements), where=echelles > 0)
+        ecart = max(ecart, ecarts.max())
+    return ecart
+
+# Propagateur grossier de Kepler : chaque corps suit une orbite képlérienne autour du corps le plus massif,
+# qui avance en ligne droite (interactions entre les autres corps ignorées)
+def propager_kepler(positions, vitesses, masses, duree):
+    coordonnees = Coordonnees.depuis_etat(positions, vitesses, masses)
+    return coordonnees.vers_cartesien(coordonnees.kepler(coordonnees.depuis_cartesien(positions, vitesses), duree))
+
+# Propagateur fin, exécuté dans les processus : renvoie l'état à la fin de la tranche
+def _propager_fin(positions, vitesses, masses, duree, options):
+    positions, vitesses = positions.copy(), vitesses.copy()
+    avancer_hermite(positions, vitesses, masses, duree, **options)
+    return positions, vitesses
+
+# Fonction pour avancer un système d'une durée donnée en mode Parareal
+# (options : celles de moteur.avancer_hermite pour le propagateur fin, ex: eta, adoucissement).
+# Par défaut : tolérance liée à la précision du propagateur fin, au plus tranches / 2 itérations. Si la limite est
+# atteinte avant la tolérance, les états ne sont pas convergés : un avertissement (RuntimeWarning) est émis.
+def parareal(positions, vitesses, masses, duree, tranches=None, iterations_max=None, tolerance=None,
+             executeur=None, **options):
+    if positions.shape[1] != 2:
+        raise ValueError("Le mode Parareal ne traite que les simulations planes.")
+    tranches = tranches or mp.cpu_count()
+    iterations_max = iterations_max or max(1, int(tranches * FRACTION_ITERATIONS_MAX))
+    if tolerance is None:
+        tolerance = TOLERANCE_PARAREAL * (options.get("eta", ETA_AARSETH) / ETA_AARSETH) ** 2
+    duree_tranche = duree / tranches
+    coordonnees = Coordonnees.depuis_etat(positions, vitesses, masses)
+
+    # Estimation initiale : propagation grossière séquentielle ; les bornes sont gardées en cartésien
+    bornes_x = np.empty((tranches + 1,) + positions.shape)
+    bornes_v = np.empty((tranches + 1,) + vitesses.shape)
+    bornes_x[0], bornes_v[0] = positions, vitesses
+    bornes = [coordonnees.depuis_cartesien(positions, vitesses)]
+    grossiers = []
+    for n in range(tranches):
+        grossiers.append(coordonnees.kepler(bornes[n], duree_tranche))
+        bornes.append(grossiers[n])
+        bornes_x[n + 1], bornes_v[n + 1] = coordonnees.vers_cartesien(grossiers[n])
+
+    proprietaire = executeur is None
+    # Processus démarrés par "spawn" : un fork après l'utilisation des noyaux OpenMP (Numba) n'est pas sûr
+    executeur = executeur or ProcessPoolExecutor(max_workers=tranches, mp_context=mp.get_context("spawn"))
+    try:
+        ecart, iteration = np.inf, 0
+        while iteration < iterations_max and ecart > tolerance:
+            # Propagation fine en parallèle ; les `iteration` premières tranches sont déjà exactes
+            futurs = {n: executeur.submit(_propager_fin, bornes_x[n], bornes_v[n], masses, duree_tranche, options) for n in range(iteration, tranches)}
+            fins = {n: futur.result() for n, futur in futurs.items()}
+            iteration += 1
+
+            # Correction séquentielle
+            anciens_x, anciens_v = bornes_x.copy(), bornes_v.copy()
+            for n in range(iteration - 1, tranches):
+                fin_x, fin_v = fins[n]
+                if n == iteration - 1:
+                    # Départ exact : le résultat fin est exact
+                    bornes_x[n + 1], bornes_v[n + 1] = fin_x, fin_v
+                    bornes[n + 1] = coordonnees.depuis_cartesien(fin_x, fin_v)
+                    continue
+                nouveau = coordonnees.kepler(bornes[n], duree_tranche)
+                bornes[n + 1] = nouveau + coordonnees.difference(coordonnees.depuis_cartesien(fin_x, fin_v), grossiers[n])
+                bornes_x[n + 1], bornes_v[n + 1] = coordonnees.vers_cartesien(bornes[n + 1])
+                grossiers[n] = nouveau
+
+            ecart = ecart_iterations(bornes_x, bornes_v, anciens_x, anciens_v, coordonnees.reference)
+    finally:
+        if proprietaire:
+            executeur.shutdown()
+
+    converge = ecart <= tolerance
+    if not converge:
+        warnings.warn(
+            f"Parareal non convergé : écart {ecart:.2e} > tolérance {tolerance:.2e} après {iteration} itérations "
+            f"(limite atteinte) ; augmenter iterations_max ou le nombre de tranches.",
+            RuntimeWarning, stacklevel=2,
+        )
+    return ResultatParareal(bornes_x[-1].copy(), bornes_v[-1].copy(), bornes_x, bornes_v, iteration, ecart, converge, tranches / iteration)
+
+# Fonction pour avancer un état (etat.SystemState) en mode Parareal
+def avancer_parareal(state, duree, **options):
+    resultat = parareal(state.positions, state.vitesses, state.masses, duree, **options)
+    state.positions[:] = resultat.positions
+    state.vitesses[:] = resultat.vitesses
+    state.temps += duree
+    return resultat
@@ -0,0 +1,130 @@
+import numpy as np
+from moteur import (
+    G, ETA_AARSETH, calculer_acceleration_et_jerk, calculer_acceleration_et_jerk_externe,
+    corriger_hermite, pas_de_temps_initial, pas_de_temps_suivant, pas_hermite, predire_hermite,
+)
+
+# Nombre de particules converties en float64 à la fois (mémoire temporaire bornée)
+TAILLE_LOT = 4096
+# Nombre de particules témoins suivies aussi en float64, pour mesurer l'écart réel dû à la précision réduite
+NOMBRE_TEMOINS = 64
+
+# Classe pour représenter une population de particules test (sans masse) en précision réduite.
+# L'état est stocké en décalages par rapport à un corps de référence (ex: héliocentrique pour le Soleil),
+# ce qui garde une bonne précision relative en float32 ; les calculs se font en float64, lot par lot.
+# Un échantillon de particules témoins est aussi intégré entièrement en float64 : l'écart entre les deux mesure
+# l'impact réel de la précision réduite, arrondis amplifiés par la dynamique compris.
+class ParticulesTest:
+    def __init__(self, positions, vitesses, position_reference, vitesse_reference, indice_reference=0, dtype='float32', temoins=NOMBRE_TEMOINS):
+        self.indice_reference = indice_reference
+        decalages_position = np.asarray(positions, dtype='float64') - position_reference
+        decalages_vitesse = np.asarray(vitesses, dtype='float64') - vitesse_reference
+        self.decalages_position = decalages_position.astype(dtype)
+        self.decalages_vitesse = decalages_vitesse.astype(dtype)
+        # Témoins régulièrement répartis dans la population, en float64
+        self.indices_temoins = np.unique(np.linspace(0, len(decalages_position) - 1, min(temoins, len(decalages_position))).astype(int))
+        self.temoins_position = decalages_position[self.indices_temoins].copy()
+        self.temoins_vitesse = decalages_vitesse[self.indices_temoins].copy()
+        # Cumul des arrondis introduits par le stockage, par particule (km et km/s) : borne inférieure de l'erreur,
+        # qui ne tient pas compte de leur croissance le long de l'orbite
+        self.erreur_position = np.zeros(len(self.decalages_position))
+        self.erreur_vitesse = np.zeros(len(self.decalages_vitesse))
+
+    def __len__(self):
+        return len(self.decalages_position)
+
+    # Positions absolues (float64) à partir de la position courante du corps de référence
+    def positions(self, position_reference):
+        return position_reference + self.decalages_position.astype('float64')
+
+    def vitesses(self, vitesse_reference):
+        return vitesse_reference + self.decalages_vitesse.astype('float64')
+
+    # Stocker un lot de décalages calculés en float64 en mesurant l'arrondi introduit
+    def _stocker(self, debut, fin, decalages_position, decalages_vitesse):
+        self.decalages_position[debut:fin] = decalages_position
+        self.decalages_vitesse[debut:fin] = decalages_vitesse
+        self.erreur_position[debut:fin] += np.linalg.norm(decalages_position - self.decalages_position[debut:fin], axis=1)
+        self.erreur_vitesse[debut:fin] += np.linalg.norm(decalages_vitesse - self.decalages_vitesse[debut:fin], axis=1)
+
+    # Rapport sur l'impact de la précision réduite : mémoire, écart réel aux témoins float64 (maximum sur l'échantillon)
+    # et cumul des arrondis de stockage (borne inférieure, sur toutes les particules)
+    def rapport_precision(self):
+        ecarts_position = np.linalg.norm(self.decalages_position[self.indices_temoins] - self.temoins_position, axis=1)
+        ecarts_vitesse = np.linalg.norm(self.decalages_vitesse[self.indices_temoins] - self.temoins_vitesse, axis=1)
+        distances = np.linalg.norm(self.temoins_position, axis=1)
+        ecarts_relatifs = np.divide(ecarts_position, distances, out=np.zeros_like(distances), where=distances > 0)
+        return {
+            "dtype": str(self.decalages_position.dtype),
+            "octets_etat": self.decalages_position.nbytes + self.decalages_vitesse.nbytes,
+            "octets_float64": 2 * self.decalages_position.size * 8,
+            "temoins": len(self.indices_temoins),
+            "erreur_position_max_km": float(ecarts_position.max(initial=0.0)),
+            "erreur_vitesse_max_kms": float(ecarts_vitesse.max(initial=0.0)),
+            "erreur_position_relative_max": float(ecarts_relatifs.max(initial=0.0)),
+            "arrondi_position_max_km": float(self.erreur_position.max(initial=0.0)),
+            "arrondi_vitesse_max_kms": float(self.erreur_vitesse.max(initial=0.0)),
+        }
+
+# Fonction pour avancer un lot de particules (décalages float64) d'un pas de Hermite dans le champ des corps massifs
+# (positions et vitesses des sources relatives au corps de référence, au début du pas et prédites)
+def _pas_hermite_lot(positions, vitesses, sources_debut, sources_predites, gm, reference_debut, reference_fin, dt, eta, adoucissement):
+    # Accélérations relatives au corps de référence (repère non inertiel)
+    acceleration, jerk = calculer_acceleration_et_jerk_externe(positions, vitesses, *sources_debut, None, adoucissement, gm=gm)
+    acceleration -= reference_debut[0]
+    jerk -= reference_debut[1]
+
+    positions_predites, vitesses_predites = predire_hermite(positions, vitesses, acceleration, jerk, dt)
+    acceleration1, jerk1 = calculer_acceleration_et_jerk_externe(positions_predites, vitesses_predites, *sources_predites, None, adoucissement, gm=gm)
+    acceleration1 -= reference_fin[0]
+    jerk1 -= reference_fin[1]
+
+    positions, vitesses = corriger_hermite(positions, vitesses, acceleration, jerk, acceleration1, jerk1, dt)
+    return positions, vitesses, pas_de_temps_suivant(acceleration, jerk, acceleration1, jerk1, dt, eta)
+
+# Fonction pour avancer les particules test (et leurs témoins float64) d'un pas de Hermite
+def _pas_hermite_particules(particules, sources_debut, sources_predites, gm, reference_debut, reference_fin, dt, eta, adoucissement):
+    champ = (sources_debut, sources_predites, gm, reference_debut, reference_fin, dt, eta, adoucissement)
+    dt_suivant = np.inf
+    for debut in range(0, len(particules), TAILLE_LOT):
+        fin = min(debut + TAILLE_LOT, len(particules))
+        positions = particules.decalages_position[debut:fin].astype('float64')
+        vitesses = particules.decalages_vitesse[debut:fin].astype('float64')
+        positions, vitesses, dt_lot = _pas_hermite_lot(positions, vitesses, *champ)
+        particules._stocker(debut, fin, positions, vitesses)
+        dt_suivant = min(dt_suivant, dt_lot)
+
+    if len(particules.indices_temoins):
+        particules.temoins_position, particules.temoins_vitesse, _ = _pas_hermite_lot(particules.temoins_position, particules.temoins_vitesse, *champ)
+    return dt_suivant
+
+# Fonction pour avancer les corps massifs (en place) et les particules test d'une durée donnée,
+# par sous-pas de Hermite partagés
+def avancer_hermite_avec_particules(positions, vitesses, masses, particules, duree, dt_initial=None, eta=ETA_AARSETH, adoucissement=0.0, moteur_calcul=None):
+    ref = particules.indice_reference
+    gm = G * masses
+    acceleration, jerk = calculer_acceleration_et_jerk(positions, vitesses, masses, adoucissement, moteur_calcul=moteur_calcul, gm=gm)
+    dt = dt_initial if dt_initial else pas_de_temps_initial(acceleration, jerk)
+
+    temps = 0.0
+    while temps < duree:
+        pas = min(dt, duree - temps)
+        if duree - temps - pas < 0.1 * pas:
+            pas = duree - temps  # Éviter un dernier sous-pas minuscule
+
+        # Sources au début du pas et prédites, dans le repère du corps de référence
+        positions_predites, vitesses_predites = predire_hermite(positions, vitesses, acceleration, jerk, pas)
+        sources_debut = (positions - positions[ref], vitesses - vitesses[ref])
+        sources_predites = (positions_predites - positions_predites[ref], vitesses_predites - vitesses_predites[ref])
+        reference_debut = (acceleration[ref].copy(), jerk[ref].copy())
+
+        acceleration, jerk, dt_aarseth = pas_hermite(positions, vitesses, masses, pas, acceleration, jerk, eta, adoucissement, moteur_calcul, gm)
+        dt_particules = _pas_hermite_particules(
+            particules, sources_debut, sources_predites, gm,
+            reference_debut, (acceleration[ref], jerk[ref]), pas, eta, adoucissement,
+        )
+
+        temps += pas
+        dt = min(dt_aarseth, dt_particules, 2 * dt)  # Limiter la croissance du pas
+
+    return dt
@@ -0,0 +1,119 @@
+import time
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+from flux import Instantane
+
+# Publication de l'état courant dans un segment de mémoire partagée nommé, lisible sans copie
+# par n'importe quel processus local. La cohérence est assurée par un verrou séquentiel (seqlock) :
+# le compteur de séquence est impair pendant l'écriture, et un lecteur recommence sa lecture
+# si le compteur a changé entre le début et la fin. L'écrivain n'attend jamais les lecteurs.
+
+# En-tête (int64) : séquence, nombre de corps, étape, capacité, dimension, temps (float64)
+SEQUENCE, NOMBRE, ETAPE, CAPACITE, DIMENSION, TEMPS = range(6)
+TAILLE_ENTETE = 64  # Octets, pour aligner les tableaux qui suivent
+
+# Fonction pour ouvrir un segment existant sans en devenir responsable : sans cela, le suivi des
+# ressources de Python (avant 3.13) détruit le segment à la sortie du processus lecteur
+def _attacher(nom):
+    try:
+        return SharedMemory(name=nom, track=False)  # Python >= 3.13
+    except TypeError:
+        pass
+    enregistrer = resource_tracker.register
+    resource_tracker.register = lambda *args: None
+    try:
+        return SharedMemory(name=nom)
+    finally:
+        resource_tracker.register = enregistrer
+
+# Fonction pour calculer la taille du segment pour une capacité donnée
+def taille_segment(capacite, dimension):
+    return TAILLE_ENTETE + capacite * (2 * dimension * 8 + 8)
+
+# Fonction pour créer les vues NumPy sur un segment : en-tête, temps, positions, vitesses, identifiants
+def _vues(bloc, capacite, dimension):
+    entete = np.ndarray((TEMPS,), dtype='int64', buffer=bloc.buf)
+    temps = np.ndarray((1,), dtype='float64', buffer=bloc.buf, offset=TEMPS * 8)
+    decalage = TAILLE_ENTETE
+    positions = np.ndarray((capacite, dimension), dtype='float64', buffer=bloc.buf, offset=decalage)
+    decalage += positions.nbytes
+    vitesses = np.ndarray((capacite, dimension), dtype='float64', buffer=bloc.buf, offset=decalage)
+    decalage += vitesses.nbytes
+    ids = np.ndarray((capacite,), dtype='int64', buffer=bloc.buf, offset=decalage)
+    return entete, temps, positions, vitesses, ids
+
+# Classe pour publier l'état d'une simulation (un seul écrivain)
+class PublicateurEtat:
+    def __init__(self, nom=None, capacite=1024, dimension=2):
+        self._bloc = SharedMemory(name=nom, create=True, size=taille_segment(capacite, dimension))
+        self.nom = self._bloc.name
+        self._entete, self._temps, self._positions, self._vitesses, self._ids = _vues(self._bloc, capacite, dimension)
+        self._entete[:] = 0
+        self._entete[CAPACITE] = capacite
+        self._entete[DIMENSION] = dimension
+
+    # Écrire l'état courant (appelé par la boucle de calcul, coût d'une copie mémoire)
+    def publier(self, state, etape=0):
+        nombre = len(state)
+        if nombre > self._entete[CAPACITE]:
+            raise ValueError(f"Le segment '{self.nom}' ne peut contenir que {self._entete[CAPACITE]} corps.")
+
+        self._entete[SEQUENCE] += 1  # Impair : écriture en cours
+        self._positions[:nombre] = state.positions
+        self._vitesses[:nombre] = state.vitesses
+        self._ids[:nombre] = state.ids
+        self._entete[NOMBRE] = nombre
+        self._entete[ETAPE] = etape
+        self._temps[0] = state.temps
+        self._entete[SEQUENCE] += 1  # Pair : état cohérent
+
+    def fermer(self):
+        self._entete = self._temps = self._positions = self._vitesses = self._ids = None
+        self._bloc.close()
+        self._bloc.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+# Classe pour lire l'état publié depuis un autre processus (autant de lecteurs que voulu)
+class LecteurEtat:
+    def __init__(self, nom):
+        self._bloc = _attacher(nom)
+        entete = np.ndarray((TEMPS,), dtype='int64', buffer=self._bloc.buf)
+        self._entete, self._temps, self._positions, self._vitesses, self._ids = _vues(self._bloc, int(entete[CAPACITE]), int(entete[DIMENSION]))
+
+    # Numéro de version de l'état publié (pair quand il est cohérent)
+    @property
+    def version(self):
+        return int(self._entete[SEQUENCE])
+
+    # Lire un instantané cohérent (copies), ou None si rien n'a encore été publié
+    def lire(self, tentatives=1000):
+        for _ in range(tentatives):
+            sequence = self._entete[SEQUENCE]
+            if sequence % 2:
+                time.sleep(0)  # Écriture en cours : laisser la main à l'écrivain
+                continue
+            nombre = self._entete[NOMBRE]
+            instantane = Instantane(
+                int(self._entete[ETAPE]), float(self._temps[0]), self._ids[:nombre].copy(),
+                self._positions[:nombre].copy(), self._vitesses[:nombre].copy(),
+            )
+            if self._entete[SEQUENCE] == sequence:
+                return instantane if sequence else None
+            time.sleep(0)
+        raise TimeoutError("Impossible de lire un état cohérent (écrivain trop rapide).")
+
+    def fermer(self):
+        self._entete = self._temps = self._positions = self._vitesses = self._ids = None
+        self._bloc.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
@@ -0,0 +1,14 @@
+# Dictionnaire des chemins d'image
+images = {
+    "Soleil": 'textures/soleil.png',  # Chemin relatif vers l'image du Soleil
+    "Terre": 'textures/earth.png',  # Exemple pour la Terre
+    "Mars": 'textures/mars.png',
+    "Venus": 'textures/venus.png',  
+    "Vénus": 'textures/venus.png',
+    "Mercure": 'textures/mercure.png',
+    "Jupiter": 'textures/jupiter.png',
+    "Saturne": 'textures/saturne.png',
+    "Uranus": 'textures/uranus.png',
+    "Neptune": 'textures/neptune.png',
+    "background": 'textures/background.jpg',  # Image de fond
+}
@@ -0,0 +1,52 @@
+import numpy as np
+from moteur import G
+from etat import SystemState
+from elements import elements_vers_etat
+
+# Un scénario décrit une simulation sans interface : masse du Soleil, planètes (orbites calculées à partir
+# de la période ; circulaires sauf si "excentricite" est donnée, avec "omega" et "anomalie_moyenne" en radians),
+# pas de temps et nombre de pas. C'est un dictionnaire sérialisable en JSON.
+SYSTEME_SOLAIRE = {
+    "masse_soleil": 1.989e30,
+    "planetes": [
+        {"nom": "Mercure", "masse": 3.301e23, "periode_jours": 87.97},
+        {"nom": "Vénus", "masse": 4.867e24, "periode_jours": 224.70},
+        {"nom": "Terre", "masse": 5.972e24, "periode_jours": 365.25},
+        {"nom": "Mars", "masse": 6.417e23, "periode_jours": 686.98},
+        {"nom": "Jupiter", "masse": 1.898e27, "periode_jours": 4332.59},
+        {"nom": "Saturne", "masse": 5.683e26, "periode_jours": 10759.22},
+        {"nom": "Uranus", "masse": 8.681e25, "periode_jours": 30688.5},
+        {"nom": "Neptune", "masse": 1.024e26, "periode_jours": 60182.0},
+    ],
+    "dt": 432000,  # Pas de temps (5 jours)
+    "etapes": int((12 * 365 * 24 * 3600) // 432000),  # 12 ans
+}
+
+# Fonction pour calculer la distance au Soleil en fonction de la période orbitale
+def calculer_distance_orbitale(periode_orbitale_jours, masse_soleil):
+    periode_orbitale_secondes = periode_orbitale_jours * 24 * 3600
+    distance_orbitale_km = (G * masse_soleil * (periode_orbitale_secondes**2) / (4 * np.pi**2))**(1/3)
+    return distance_orbitale_km
+
+# Fonction pour calculer la vitesse orbitale circulaire
+def calculer_vitesse_orbitale(distance_orbitale_km, masse_soleil):
+    return np.sqrt(G * masse_soleil / distance_orbitale_km)
+
+# Fonction pour construire l'état initial d'un scénario (même convention que la saisie interactive :
+# une planète sur orbite circulaire part de (distance_orbitale, 0) avec une vitesse perpendiculaire)
+def construire_etat(scenario):
+    masse_soleil = scenario["masse_soleil"]
+    etat = SystemState()
+    etat.ajouter("Soleil", masse_soleil, [0, 0], [0, 0])
+    for planete in scenario["planetes"]:
+        distance_orbitale_km = calculer_distance_orbitale(planete["periode_jours"], masse_soleil)  # Demi-grand axe
+        excentricite = planete.get("excentricite", 0.0)
+        if excentricite:
+            position, vitesse = elements_vers_etat(
+                distance_orbitale_km, excentricite, planete.get("omega", 0.0), planete.get("anomalie_moyenne", 0.0), G * masse_soleil,
+            )
+        else:
+            vitesse_orbitale_kms = calculer_vitesse_orbitale(distance_orbitale_km, masse_soleil)
+            position, vitesse = [distance_orbitale_km, 0], [0, vitesse_orbitale_kms]
+        etat.ajouter(planete["nom"], planete["masse"], position, vitesse)
+    return etat
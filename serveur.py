@@ -0,0 +1,224 @@
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import struct
+import numpy as np
+from ressources import images
+from scenario import SYSTEME_SOLAIRE, construire_etat
+from service import ServiceSimulation
+
+# Serveur local : la simulation tourne une seule fois, sans interface, et chaque navigateur connecté
+# reçoit les positions en trames WebSocket binaires (images clés float32, puis deltas quantifiés en int16). Le visualiseur
+# (visualiseur/index.html) et les textures sont servis en HTTP sur le même port.
+
+DOSSIER = os.path.dirname(os.path.abspath(__file__))
+DOSSIER_TEXTURES = os.path.join(DOSSIER, "textures")
+PAGE_VISUALISEUR = os.path.join(DOSSIER, "visualiseur", "index.html")
+
+GUID_WEBSOCKET = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+OPCODE_TEXTE = 0x1
+OPCODE_BINAIRE = 0x2
+OPCODE_FERMETURE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+CODE_ERREUR_SERVEUR = 1011  # Code de fermeture WebSocket : la simulation s'est arrêtée sur une erreur
+
+# En-tête des trames de positions (petit-boutiste) : type, étape, temps (s), nombre de corps, échelle des deltas (km).
+# 24 octets, pour que les positions float32 (ou les deltas int16) qui suivent soient alignées côté navigateur.
+ENTETE_IMAGE = struct.Struct('<BxxxIdIf')
+IMAGE_CLE = 0
+IMAGE_DELTA = 1
+INTERVALLE_IMAGES_CLES = 100  # Une image complète toutes les N images
+NIVEAUX_DELTA = 32767  # Delta maximal d'une image, en unités de l'échelle
+
+TYPES_CONTENU = {".html": "text/html; charset=utf-8", ".png": "image/png", ".jpg": "image/jpeg", ".json": "application/json"}
+
+# Classe pour coder les positions d'un consommateur : image clé float32, puis différences avec
+# l'image reconstruite par le navigateur, quantifiées en int16 avec une échelle par image (deux fois moins
+# d'octets qu'une image clé). Les différences sont prises par rapport à l'image reconstruite, donc l'erreur
+# de quantification ne s'accumule pas : elle reste inférieure à une demi-échelle. Chaque connexion a son
+# propre encodeur, car les images perdues par la contre-pression diffèrent d'un consommateur à l'autre.
+class EncodeurImages:
+    def __init__(self, intervalle_images_cles=INTERVALLE_IMAGES_CLES):
+        self.intervalle_images_cles = intervalle_images_cles
+        self.reference = None
+        self.ids = None
+        self.compteur = 0
+
+    # Vrai si la liste des corps a changé depuis la dernière image (métadonnées à renvoyer)
+    def corps_modifies(self, instantane):
+        return self.ids is None or not np.array_equal(self.ids, instantane.ids)
+
+    def encoder(self, instantane):
+        cle = self.corps_modifies(instantane) or self.compteur % self.intervalle_images_cles == 0
+        self.compteur += 1
+        if cle:
+            donnees = instantane.positions.astype('float32')
+            self.reference = donnees
+            self.ids = instantane.ids.copy()
+            type_image, echelle = IMAGE_CLE, 0.0
+        else:
+            delta = instantane.positions - self.reference
+            echelle = float(np.float32(np.abs(delta).max() / NIVEAUX_DELTA)) or 1.0  # Valeur transmise en float32
+            donnees = np.clip(np.rint(delta / echelle), -NIVEAUX_DELTA, NIVEAUX_DELTA).astype('int16')
+            # Même calcul que le navigateur : produit et somme en double, arrondis en float32
+            self.reference = (self.reference + donnees * echelle).astype('float32')
+            type_image = IMAGE_DELTA
+        entete = ENTETE_IMAGE.pack(type_image, instantane.etape, instantane.temps, len(donnees), echelle)
+        return entete + donnees.tobytes()
+
+# Fonction pour construire une trame WebSocket serveur -> client (non masquée)
+def trame_websocket(donnees, opcode=OPCODE_BINAIRE):
+    longueur = len(donnees)
+    if longueur < 126:
+        entete = struct.pack('!BB', 0x80 | opcode, longueur)
+    elif longueur < 1 << 16:
+        entete = struct.pack('!BBH', 0x80 | opcode, 126, longueur)
+    else:
+        entete = struct.pack('!BBQ', 0x80 | opcode, 127, longueur)
+    return entete + donnees
+
+# Fonction pour lire une trame WebSocket client -> serveur (masquée), renvoie (opcode, données)
+async def lire_trame(lecteur):
+    octet0, octet1 = await lecteur.readexactly(2)
+    longueur = octet1 & 0x7F
+    if longueur == 126:
+        longueur, = struct.unpack('!H', await lecteur.readexactly(2))
+    elif longueur == 127:
+        longueur, = struct.unpack('!Q', await lecteur.readexactly(8))
+    masque = await lecteur.readexactly(4) if octet1 & 0x80 else bytes(4)
+    donnees = await lecteur.readexactly(longueur)
+    donnees = bytes(octet ^ masque[i % 4] for i, octet in enumerate(donnees))
+    return octet0 & 0x0F, donnees
+
+# Classe pour le serveur HTTP/WebSocket partageant une simulation entre tous les visualiseurs
+class ServeurVisualisation:
+    def __init__(self, scenario=SYSTEME_SOLAIRE, every=1, images_par_seconde=30):
+        self.etat = construire_etat(scenario)
+        self.service = ServiceSimulation(self.etat, scenario["dt"], scenario["etapes"], every, images_par_seconde)
+
+    # Métadonnées de la scène : noms, identifiants et textures des corps
+    def scene(self):
+        noms = list(self.etat.noms)
+        textures = {nom: "/" + images[nom] for nom in noms if nom in images}
+        return {
+            "noms": noms,
+            "ids": [int(i) for i in self.etat.ids],
+            "textures": textures,
+            "fond": "/" + images["background"],
+            "dt": self.service.dt,
+        }
+
+    async def _repondre(self, ecrivain, statut, contenu, type_contenu, cache=False):
+        entetes = [f"HTTP/1.1 {statut}", f"Content-Type: {type_contenu}", f"Content-Length: {len(contenu)}", "Connection: close"]
+        if cache:
+            entetes.append("Cache-Control: public, max-age=86400, immutable")  # Textures chargées une seule fois
+        ecrivain.write(("\r\n".join(entetes) + "\r\n\r\n").encode() + contenu)
+        await ecrivain.drain()
+        ecrivain.close()
+
+    async def _servir_fichier(self, ecrivain, chemin, cache=False):
+        try:
+            with open(chemin, 'rb') as fichier:
+                contenu = fichier.read()
+        except OSError:
+            await self._repondre(ecrivain, "404 Not Found", b"Introuvable", "text/plain")
+            return
+        type_contenu = TYPES_CONTENU.get(os.path.splitext(chemin)[1], "application/octet-stream")
+        await self._repondre(ecrivain, "200 OK", contenu, type_contenu, cache)
+
+    # Traitement d'une connexion : fichiers statiques, scène, ou flux WebSocket
+    async def traiter(self, lecteur, ecrivain):
+        try:
+            requete = (await lecteur.readuntil(b"\r\n\r\n")).decode('latin-1').split("\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            ecrivain.close()
+            return
+        chemin = requete[0].split(" ")[1] if len(requete[0].split(" ")) > 1 else "/"
+        entetes = {ligne.split(":", 1)[0].strip().lower(): ligne.split(":", 1)[1].strip() for ligne in requete[1:] if ":" in ligne}
+
+        if chemin == "/flux" and entetes.get("upgrade", "").lower() == "websocket":
+            if "sec-websocket-key" not in entetes:
+                await self._repondre(ecrivain, "400 Bad Request", b"En-tete Sec-WebSocket-Key manquant", "text/plain")
+                return
+            await self._flux_websocket(lecteur, ecrivain, entetes["sec-websocket-key"])
+        elif chemin in ("/", "/index.html"):
+            await self._servir_fichier(ecrivain, PAGE_VISUALISEUR)
+        elif chemin == "/scene":
+            await self._repondre(ecrivain, "200 OK", json.dumps(self.scene()).encode(), TYPES_CONTENU[".json"])
+        elif chemin.startswith("/textures/"):
+            await self._servir_fichier(ecrivain, os.path.join(DOSSIER_TEXTURES, os.path.basename(chemin)), cache=True)
+        else:
+            await self._repondre(ecrivain, "404 Not Found", b"Introuvable", "text/plain")
+
+    async def _flux_websocket(self, lecteur, ecrivain, cle):
+        acceptation = base64.b64encode(hashlib.sha1((cle + GUID_WEBSOCKET).encode()).digest()).decode()
+        ecrivain.write((
+            "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {acceptation}\r\n\r\n"
+        ).encode())
+        await ecrivain.drain()
+
+        abonnement = self.service.abonner()
+        encodeur = EncodeurImages()
+
+        # Lecture des trames du navigateur : fermeture et ping uniquement
+        async def ecouter():
+            while True:
+                opcode, donnees = await lire_trame(lecteur)
+                if opcode == OPCODE_FERMETURE:
+                    return
+                if opcode == OPCODE_PING:
+                    ecrivain.write(trame_websocket(donnees, OPCODE_PONG))
+
+        ecoute = asyncio.ensure_future(ecouter())
+        try:
+            async for instantane in abonnement:
+                if ecoute.done():
+                    break
+                if encodeur.corps_modifies(instantane):
+                    ecrivain.write(trame_websocket(json.dumps(self.scene()).encode(), OPCODE_TEXTE))
+                ecrivain.write(trame_websocket(encodeur.encoder(instantane)))
+                await ecrivain.drain()
+            if not ecoute.done():
+                ecrivain.write(trame_websocket(b"", OPCODE_FERMETURE))
+                await ecrivain.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as erreur:
+            # Erreur de la simulation : fermeture avec un code d'erreur (et non une fin normale)
+            raison = str(erreur).encode()[:120].decode(errors='ignore').encode()  # Trame de contrôle : 125 octets au plus
+            ecrivain.write(trame_websocket(struct.pack('>H', CODE_ERREUR_SERVEUR) + raison, OPCODE_FERMETURE))
+            await ecrivain.drain()
+        finally:
+            abonnement.fermer()
+            ecoute.cancel()
+            ecrivain.close()
+
+    async def servir(self, hote="127.0.0.1", port=8765):
+        serveur = await asyncio.start_server(self.traiter, hote, port)
+        self.service.demarrer()
+        print(f"Visualiseur disponible sur http://{hote}:{port}/")
+        try:
+            async with serveur:
+                await serveur.serve_forever()
+        finally:
+            await self.service.arreter()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serveur local de visualisation de la simulation")
+    parser.add_argument("--hote", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--scenario", help="Fichier JSON du scénario (par défaut : système solaire)")
+    parser.add_argument("--ips", type=float, default=30, help="Images par seconde")
+    arguments = parser.parse_args()
+
+    scenario = SYSTEME_SOLAIRE
+    if arguments.scenario:
+        with open(arguments.scenario, encoding='utf-8') as fichier:
+            scenario = json.load(fichier)
+
+    asyncio.run(ServeurVisualisation(scenario, images_par_seconde=arguments.ips).servir(arguments.hote, arguments.port))
@@ -0,0 +1,130 @@
+import asyncio
+import threading
+import time
+from flux import simulate
+
+# Politiques de contre-pression quand un consommateur est en retard :
+# "dernier" : abandonner l'instantané le plus ancien en attente (le consommateur reçoit toujours le plus récent)
+# "abandon" : abandonner le nouvel instantané
+POLITIQUES = ("dernier", "abandon")
+
+# Marqueur de fin de flux
+_FIN = object()
+
+# Marqueur de fin de flux sur erreur : l'exception levée par la simulation, relancée chez chaque consommateur
+class _Erreur:
+    def __init__(self, erreur):
+        self.erreur = erreur
+
+# Fonction pour savoir si un élément termine le flux (il n'est jamais abandonné)
+def _est_fin(element):
+    return element is _FIN or isinstance(element, _Erreur)
+
+# Classe pour représenter le flux d'un consommateur (itérateur asynchrone à tampon borné)
+class Abonnement:
+    def __init__(self, service, taille_tampon, politique):
+        if politique not in POLITIQUES:
+            raise ValueError(f"Politique inconnue '{politique}' (attendu : {', '.join(POLITIQUES)}).")
+        self.service = service
+        self.politique = politique
+        self.images_perdues = 0
+        self._file = asyncio.Queue(maxsize=taille_tampon)
+
+    # Déposer un instantané en appliquant la politique de contre-pression (boucle d'événements uniquement)
+    def _deposer(self, element):
+        if self._file.full():
+            if not _est_fin(element) and self.politique == "abandon":
+                self.images_perdues += 1
+                return
+            self._file.get_nowait()
+            self.images_perdues += not _est_fin(element)
+        self._file.put_nowait(element)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        element = await self._file.get()
+        if _est_fin(element):
+            self.service._abonnements.discard(self)
+            if element is _FIN:
+                raise StopAsyncIteration
+            raise element.erreur
+        return element
+
+    def fermer(self):
+        self.service._abonnements.discard(self)
+
+# Classe pour exécuter la simulation dans un exécuteur et diffuser les instantanés aux consommateurs asynchrones,
+# sans bloquer la boucle d'événements. Un seul calcul physique alimente tous les abonnements.
+class ServiceSimulation:
+    def __init__(self, state, dt, steps, every=1, images_par_seconde=None, taille_tampon=2, politique="dernier", executeur=None, **options):
+        self.state = state
+        self.dt = dt
+        self.steps = steps
+        self.every = every
+        self.images_par_seconde = images_par_seconde  # Cadence maximale de production (None : au plus vite)
+        self.taille_tampon = taille_tampon
+        self.politique = politique
+        self.executeur = executeur
+        self.options = options
+        self.dernier_instantane = None
+        self._fin = None  # Élément de fin publié (_FIN, ou l'erreur de la simulation)
+        self._abonnements = set()
+        self._arret = threading.Event()
+        self._tache = None
+
+    # Créer un flux pour un nouveau consommateur
+    def abonner(self, taille_tampon=None, politique=None):
+        abonnement = Abonnement(self, taille_tampon or self.taille_tampon, politique or self.politique)
+        self._abonnements.add(abonnement)
+        if self._fin is not None:
+            abonnement._deposer(self._fin)
+        return abonnement
+
+    def __aiter__(self):
+        abonnement = self.abonner()
+        self.demarrer()
+        return abonnement
+
+    # Distribuer un instantané à tous les abonnements (appelé dans la boucle d'événements)
+    def _publier(self, element):
+        if _est_fin(element):
+            self._fin = element
+        else:
+            self.dernier_instantane = element
+        for abonnement in list(self._abonnements):
+            abonnement._deposer(element)
+
+    # Boucle de calcul exécutée dans un thread de l'exécuteur. Une erreur de la simulation est transmise
+    # aux consommateurs (relancée par leur itération) au lieu d'une fin de flux normale.
+    def _produire(self, boucle):
+        intervalle = 1 / self.images_par_seconde if self.images_par_seconde else 0
+        prochaine = time.monotonic()
+        fin = _FIN
+        try:
+            for instantane in simulate(self.state, self.dt, self.steps, self.every, copie=True, **self.options):
+                if self._arret.is_set():
+                    break
+                if intervalle:
+                    prochaine += intervalle
+                    time.sleep(max(0.0, prochaine - time.monotonic()))
+                boucle.call_soon_threadsafe(self._publier, instantane)
+        except Exception as erreur:
+            fin = _Erreur(erreur)
+            raise
+        finally:
+            boucle.call_soon_threadsafe(self._publier, fin)
+
+    # Lancer la simulation en arrière-plan (sans effet si elle tourne déjà)
+    def demarrer(self):
+        if self._tache is None:
+            boucle = asyncio.get_running_loop()
+            self._tache = boucle.run_in_executor(self.executeur, self._produire, boucle)
+        return self._tache
+
+    # Demander l'arrêt de la simulation et attendre la fin du calcul en cours
+    async def arreter(self):
+        self._arret.set()
+        if self._tache is not None:
+            await self._tache
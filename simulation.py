@@ -6,23 +6,11 @@ from tkinter import Tk, simpledialog
 import re
 from matplotlib.offsetbox import OffsetImage, AnnotationBbox  # Pour afficher les images sur la carte
 from tableau import afficher_tableau
-
-# Constante gravitationnelle (en km^3 kg^(-1) s^(-2))
-G = 6.67430e-20  # Constante gravitationnelle en km^3/kg/s^2
-
-# Dictionnaire des chemins d'image
-images = {
-    "Soleil": 'textures/soleil.png',  # Chemin relatif vers l'image du Soleil
-    "Terre": 'textures/earth.png',  # Exemple pour la Terre
-    "Mars": 'textures/mars.png',
-    "Venus": 'textures/venus.png',  
-    "Vénus": 'textures/venus.png',
-    "Mercure": 'textures/mercure.png',
-    "Jupiter": 'textures/jupiter.png',
-    "Saturne": 'textures/saturne.png',
-    "Uranus": 'textures/uranus.png',
-    "background": 'textures/background.jpg',  # Image de fond
-}
+from moteur import G
+from etat import SystemState
+from flux import simulate
+from ressources import images
+from scenario import calculer_distance_orbitale, calculer_vitesse_orbitale
 
 # Fonction pour convertir l'entrée de l'utilisateur en un nombre flottant
 def convertir_entree_scientifique(entree):
@@ -32,14 +20,13 @@ def convertir_entree_scientifique(entree):
     except ValueError:
         raise ValueError(f"Impossible de convertir l'entrée '{entree}' en nombre.")
 
-# Classe pour représenter un objet céleste
+# Classe pour représenter un objet céleste : vue sur sa ligne dans l'état du système
 class Corps:
-    def __init__(self, nom, masse, position, vitesse, image_path=None):
-        self.nom = nom
-        self.masse = masse
-        self.position = np.array(position, dtype='float64')
-        self.vitesse = np.array(vitesse, dtype='float64')
-        self.force = np.array([0.0, 0.0], dtype='float64')
+    __slots__ = ("etat", "identifiant", "image", "offset_image")
+
+    def __init__(self, nom, masse, position, vitesse, image_path=None, etat=None):
+        self.etat = etat if etat is not None else SystemState()
+        self.identifiant = self.etat.ajouter(nom, masse, position, vitesse)
         
         # Si une image est fournie, charger l'image
         if image_path:
@@ -50,6 +37,47 @@ class Corps:
             self.image = None
             self.offset_image = None
 
+    # Ligne actuelle du corps (elle change si d'autres corps sont retirés)
+    @property
+    def indice(self):
+        return self.etat.ligne(self.identifiant)
+
+    @property
+    def nom(self):
+        return self.etat.noms[self.indice]
+
+    @property
+    def masse(self):
+        return self.etat.masses[self.indice]
+
+    @masse.setter
+    def masse(self, valeur):
+        self.etat.modifier_masse(self.identifiant, valeur)
+
+    @property
+    def position(self):
+        return self.etat.positions[self.indice]
+
+    @position.setter
+    def position(self, valeur):
+        self.etat.positions[self.indice] = valeur
+
+    @property
+    def vitesse(self):
+        return self.etat.vitesses[self.indice]
+
+    @vitesse.setter
+    def vitesse(self, valeur):
+        self.etat.vitesses[self.indice] = valeur
+
+    @property
+    def force(self):
+        return self.etat.forces[self.indice]
+
+    @force.setter
+    def force(self, valeur):
+        self.etat.forces[self.indice] = valeur
+
     def maj_force(self, autres_corps):
         self.force = np.array([0.0, 0.0], dtype='float64')
         
@@ -71,19 +99,12 @@ class Corps:
         self.vitesse += acceleration * dt
         self.position += self.vitesse * dt
 
-# Fonction pour calculer la distance au Soleil en fonction de la période orbitale
-def calculer_distance_orbitale(periode_orbitale_jours, masse_soleil):
-    periode_orbitale_secondes = periode_orbitale_jours * 24 * 3600
-    distance_orbitale_km = (G * masse_soleil * (periode_orbitale_secondes**2) / (4 * np.pi**2))**(1/3)
-    return distance_orbitale_km
-
-# Fonction pour calculer la vitesse orbitale circulaire
-def calculer_vitesse_orbitale(distance_orbitale_km, masse_soleil):
-    return np.sqrt(G * masse_soleil / distance_orbitale_km)
-
 # Fonction pour entrer les données manuellement via Tkinter
-def entrer_corps(masse_soleil):
+def entrer_corps(masse_soleil, etat=None):
     nom = simpledialog.askstring("Input", "Entrez le nom de la planète :")
+    # Le nom identifie le corps dans l'état : redemander un nom déjà utilisé
+    while nom and etat is not None and nom in etat.identifiants:
+        nom = simpledialog.askstring("Input", f"Le nom '{nom}' est déjà utilisé, entrez un autre nom :")
     if not nom:
         return None
     
@@ -108,11 +129,12 @@ def entrer_corps(masse_soleil):
     # Vérifier si l'image existe pour la planète
     image_path = images.get(nom, None)
     
-    return Corps(nom, masse, position, vitesse, image_path)
+    return Corps(nom, masse, position, vitesse, image_path, etat)
 
 # Fonction principale pour exécuter la simulation
 def run_simulation():
     corps_celestes = []
+    etat = SystemState()  # État partagé par tous les corps
     nombre_corps = simpledialog.askinteger("Input", "Combien de planètes voulez-vous ajouter (hors Soleil) ?")
 
     # Demander la masse du Soleil à l'utilisateur
@@ -122,13 +144,13 @@ def run_simulation():
     masse_soleil = convertir_entree_scientifique(masse_soleil_str)
 
     # Soleil (avec masse dynamique et image)
-    soleil = Corps("Soleil", masse=masse_soleil, position=[0, 0], vitesse=[0, 0], image_path=images["Soleil"])
+    soleil = Corps("Soleil", masse=masse_soleil, position=[0, 0], vitesse=[0, 0], image_path=images["Soleil"], etat=etat)
     corps_celestes.append(soleil)
 
     # Ajouter les planètes
     distances = []  # Stocker les distances orbitale pour ajuster les limites de l'axe
     for _ in range(nombre_corps):
-        corps = entrer_corps(masse_soleil)  # Passez masse_soleil ici
+        corps = entrer_corps(masse_soleil, etat)  # Passez masse_soleil ici
         if corps:
             corps_celestes.append(corps)
             distance = np.linalg.norm(corps.position)  # Distance orbitale initiale
@@ -180,10 +202,9 @@ def run_simulation():
             scatter.set_data([], [])
         return scatters.values()
 
-    def update(frame):
+    # Chaque image reçoit l'instantané suivant, calculé à la demande par le générateur
+    def update(instantane):
         for corps in corps_celestes:
-            corps.maj_force(corps_celestes)
-            corps.maj_position_et_vitesse(dt)
             positions[corps.nom].append(corps.position.copy())
 
         for annotation in annotations:
@@ -200,17 +221,19 @@ def run_simulation():
         ax.add_artist(ab_soleil)
         return annotations + [ab_soleil]
 
-    ani = FuncAnimation(fig, update, frames=total_steps, init_func=init, blit=True, repeat=False)
+    ani = FuncAnimation(fig, update, frames=simulate(etat, dt, total_steps), init_func=init, blit=True, repeat=False,
+                        save_count=total_steps, cache_frame_data=False)
 
     plt.show()
     afficher_tableau(corps_celestes)
 
-# Créer la fenêtre principale
-root = Tk()
-root.withdraw()  # Cacher la fenêtre principale
+if __name__ == "__main__":
+    # Créer la fenêtre principale
+    root = Tk()
+    root.withdraw()  # Cacher la fenêtre principale
 
-# Lancer la simulation
-run_simulation()
+    # Lancer la simulation
+    run_simulation()
 
-# Fermer l'application après la simulation
-root.destroy()
\ No newline at end of file
+    # Fermer l'application après la simulation
+    root.destroy()
\ No newline at end of file
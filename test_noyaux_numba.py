@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("numba")
+
+from moteur import G, calculer_acceleration_et_jerk, pas_hermite
+
+# Les noyaux compilés (Numba) doivent donner les mêmes résultats que le chemin NumPy
+TOLERANCE = 1e-14
+# Le pas suivant est estimé par différences finies des accélérations (snap, crackle), qui amplifient
+# les écarts d'arrondi : il n'est comparé qu'à cette tolérance
+TOLERANCE_PAS = 1e-6
+
+# Système de test : un soleil et des corps sur des orbites quasi circulaires
+def systeme(n=300, graine=0):
+    generateur = np.random.default_rng(graine)
+    rayons = generateur.uniform(5e7, 5e9, n - 1)
+    angles = generateur.uniform(0, 2 * np.pi, n - 1)
+    vitesses_orbitales = np.sqrt(G * 1.989e30 / rayons)
+    positions = np.zeros((n, 2))
+    vitesses = np.zeros((n, 2))
+    positions[1:] = np.stack([rayons * np.cos(angles), rayons * np.sin(angles)], axis=1)
+    vitesses[1:] = np.stack([-vitesses_orbitales * np.sin(angles), vitesses_orbitales * np.cos(angles)], axis=1)
+    masses = np.concatenate([[1.989e30], 10 ** generateur.uniform(20, 26, n - 1)])
+    return positions, vitesses, masses
+
+def ecart_relatif(a, b):
+    return np.max(np.abs(a - b)) / np.max(np.abs(b))
+
+@pytest.mark.parametrize("adoucissement", [0.0, 1e5])
+def test_acceleration_et_jerk(adoucissement):
+    positions, vitesses, masses = systeme()
+    acceleration_numba, jerk_numba = calculer_acceleration_et_jerk(positions, vitesses, masses, adoucissement, moteur_calcul="numba")
+    acceleration_numpy, jerk_numpy = calculer_acceleration_et_jerk(positions, vitesses, masses, adoucissement, moteur_calcul="numpy")
+    assert ecart_relatif(acceleration_numba, acceleration_numpy) < TOLERANCE
+    assert ecart_relatif(jerk_numba, jerk_numpy) < TOLERANCE
+
+@pytest.mark.parametrize("adoucissement", [0.0, 1e5])
+def test_pas_hermite(adoucissement):
+    resultats = {}
+    for moteur_calcul in ("numba", "numpy"):
+        positions, vitesses, masses = systeme()
+        acceleration, jerk, dt_suivant = pas_hermite(positions, vitesses, masses, 3600.0, adoucissement=adoucissement, moteur_calcul=moteur_calcul)
+        resultats[moteur_calcul] = (positions, vitesses, acceleration, jerk, dt_suivant)
+    for numba, numpy in zip(resultats["numba"][:4], resultats["numpy"][:4]):
+        assert ecart_relatif(numba, numpy) < TOLERANCE
+    assert abs(resultats["numba"][4] - resultats["numpy"][4]) < TOLERANCE_PAS * resultats["numpy"][4]